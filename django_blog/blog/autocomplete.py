@@ -0,0 +1,216 @@
+# blog/autocomplete.py
+
+"""
+Search-as-you-type suggestions for post titles and tags.
+
+Each process keeps sorted arrays of ``(key, ...)`` tuples in memory and
+answers a prefix with two binary searches (``bisect``) and a short scan, so
+a lookup does not touch the database and stays well under a millisecond
+for 100k titles. Every word of a title is a key ("tips" finds "Django
+tips"); tags in use (with a TagStat row) are keyed by name. Keys are
+case-folded.
+
+The arrays are loaded on the first lookup. blog/signals.py patches them in
+place when a post or tag changes in this process; changes made by other
+processes show up once BLOG_AUTOCOMPLETE_TTL seconds have passed and the
+arrays are reloaded. A reload is built without holding the lock lookups
+take, so they keep answering from the old arrays meanwhile, and patches
+made during it are replayed onto the new ones.
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from .models import Post, TagStat
+
+_WORD = re.compile(r"\w+")
+
+# Sorts after every character a key can contain.
+_END = "\U0010ffff"
+
+
+def _ttl():
+    return getattr(settings, "BLOG_AUTOCOMPLETE_TTL", 300)
+
+
+def title_keys(title):
+    """The whole title and every suffix starting at a word, case-folded."""
+    folded = title.casefold()
+    return {folded[match.start():] for match in _WORD.finditer(folded)} | {folded}
+
+
+class PrefixIndex:
+    """A sorted array of ``(key, value)`` pairs searchable by key prefix."""
+
+    def __init__(self, pairs=()):
+        self.entries = sorted(pairs)
+
+    def add(self, keys, value):
+        for key in keys:
+            insort(self.entries, (key, value))
+
+    def discard(self, keys, value):
+        for key in keys:
+            i = bisect_left(self.entries, (key, value))
+            if i < len(self.entries) and self.entries[i] == (key, value):
+                del self.entries[i]
+
+    def search(self, prefix, limit):
+        """Distinct values whose key starts with ``prefix``, in key order."""
+        entries = self.entries
+        start = bisect_left(entries, (prefix,))
+        stop = bisect_left(entries, (prefix + _END,), start)
+        found = []
+        # Indexing rather than slicing: a short prefix can span most of the array.
+        for i in range(start, stop):
+            value = entries[i][1]
+            if value not in found:
+                found.append(value)
+                if len(found) == limit:
+                    break
+        return found
+
+
+class Suggestions:
+    def __init__(self):
+        # Guards the arrays; held only for lookups and in-place patches.
+        self._lock = threading.Lock()
+        # Held by the one thread that is reloading.
+        self._load_lock = threading.Lock()
+        self._loaded_at = None
+        # Patches that arrive during a reload, replayed onto its result.
+        self._pending = None
+        self.titles = PrefixIndex()
+        self.tags = PrefixIndex()
+        # What each post and tag was indexed under, to find the entries to
+        # drop when it is renamed or deleted.
+        self._post_titles = {}
+        self._tag_names = {}
+
+    def _fresh(self):
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < _ttl()
+
+    def _ensure_loaded(self):
+        if self._fresh():
+            return
+        if self._loaded_at is None:
+            # Nothing to serve yet: wait for the first load.
+            self._load_lock.acquire()
+        elif not self._load_lock.acquire(blocking=False):
+            # Another thread is reloading; keep serving the current arrays.
+            return
+        try:
+            if not self._fresh():
+                self._reload()
+        finally:
+            self._load_lock.release()
+
+    def _reload(self):
+        """Rebuild the arrays outside ``_lock`` and swap them in."""
+        with self._lock:
+            self._pending = []
+        try:
+            post_titles = dict(Post.objects.values_list("pk", "title"))
+            # Only tags in use: the others have no page to link to.
+            tag_names = {
+                pk: (name, slug)
+                for pk, name, slug in TagStat.objects.values_list("tag_id", "tag__name", "tag__slug")
+            }
+            titles = PrefixIndex(
+                (key, (pk, title)) for pk, title in post_titles.items() for key in title_keys(title)
+            )
+            tags = PrefixIndex((name.casefold(), (name, slug)) for name, slug in tag_names.values())
+        except BaseException:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            self.titles, self.tags = titles, tags
+            self._post_titles, self._tag_names = post_titles, tag_names
+            for apply, arg in self._pending:
+                apply(arg)
+            self._pending = None
+            self._loaded_at = time.monotonic()
+
+    def suggest(self, prefix, limit=10):
+        prefix = prefix.casefold().strip()
+        if not prefix:
+            return [], []
+        self._ensure_loaded()
+        with self._lock:
+            return self.titles.search(prefix, limit), self.tags.search(prefix, limit)
+
+    def reset(self):
+        with self._lock:
+            self._loaded_at = None
+
+    # ---------------------------
+    # INCREMENTAL UPDATES
+    # ---------------------------
+
+    def _patch(self, apply, arg):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((apply, arg))
+            if self._loaded_at is not None:
+                apply(arg)
+
+    def post_saved(self, post):
+        self._patch(self._index_post, (post.pk, post.title))
+
+    def post_deleted(self, post_id):
+        self._patch(self._drop_post, post_id)
+
+    def tag_saved(self, tag):
+        # A renamed tag; new tags appear once they are in use (tags_recounted).
+        self._patch(self._rename_tag, (tag.pk, tag.name, tag.slug))
+
+    def tag_deleted(self, tag_id):
+        self._patch(self._drop_tag, tag_id)
+
+    def tags_recounted(self, tag_ids):
+        """Add ``tag_ids`` that are now in use, drop the ones that are not."""
+        if self._loaded_at is None and self._pending is None:
+            return
+        in_use = TagStat.objects.filter(tag_id__in=tag_ids).values_list("tag_id", "tag__name", "tag__slug")
+        self._patch(self._retag, (set(tag_ids), list(in_use)))
+
+    def _index_post(self, post):
+        pk, title = post
+        self._drop_post(pk)
+        self.titles.add(title_keys(title), (pk, title))
+        self._post_titles[pk] = title
+
+    def _drop_post(self, post_id):
+        old = self._post_titles.pop(post_id, None)
+        if old is not None:
+            self.titles.discard(title_keys(old), (post_id, old))
+
+    def _index_tag(self, tag):
+        pk, name, slug = tag
+        self._drop_tag(pk)
+        self.tags.add([name.casefold()], (name, slug))
+        self._tag_names[pk] = (name, slug)
+
+    def _rename_tag(self, tag):
+        if tag[0] in self._tag_names:
+            self._index_tag(tag)
+
+    def _retag(self, recount):
+        tag_ids, in_use = recount
+        for tag in in_use:
+            self._index_tag(tag)
+        for tag_id in tag_ids - {tag[0] for tag in in_use}:
+            self._drop_tag(tag_id)
+
+    def _drop_tag(self, tag_id):
+        old = self._tag_names.pop(tag_id, None)
+        if old is not None:
+            self.tags.discard([old[0].casefold()], old)
+
+
+suggestions = Suggestions()
@@ -0,0 +1,57 @@
+# blog/cache.py
+
+"""
+Versioning for the cached fragments of post_detail.html.
+
+Each post has a *fragment state* in the cache: a version (the time it was
+created, in nanoseconds) and the ids of everyone who has commented. The
+version is part of every fragment key, so dropping the state makes all of
+the post's fragments unreachable at once; the next request starts a new
+version. The commenter ids let the comment list be shared by every viewer
+except those who see edit/delete links on their own comments.
+
+blog/signals.py drops the state whenever the post, its comments or its
+tags change. Changes nothing tracks, such as a renamed author, show up
+once BLOG_FRAGMENT_CACHE_TIMEOUT has passed.
+"""
+
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Comment
+
+
+def fragment_timeout():
+    return getattr(settings, "BLOG_FRAGMENT_CACHE_TIMEOUT", 600)
+
+
+def _state_key(post_id):
+    return f"blog:post-fragments:{post_id}"
+
+
+def fragment_state(post_id):
+    """``(version, commenter ids)`` for ``post_id``'s cached fragments."""
+    state = cache.get(_state_key(post_id))
+    if state is None:
+        commenters = frozenset(
+            Comment.objects.filter(post_id=post_id).values_list("author_id", flat=True).distinct()
+        )
+        state = (time.time_ns(), commenters)
+        # add() keeps whichever state a concurrent request stored first.
+        if not cache.add(_state_key(post_id), state, fragment_timeout()):
+            state = cache.get(_state_key(post_id), state)
+    return state
+
+
+def invalidate_post(*post_ids):
+    """Drop the cached fragments of ``post_ids``, now and again on commit.
+
+    The second pass covers a request that read the old rows and stored a
+    fresh state before the change committed.
+    """
+    keys = [_state_key(post_id) for post_id in post_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -0,0 +1,44 @@
+# blog/management/commands/bench_autocomplete.py
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.autocomplete import PrefixIndex, title_keys
+
+
+class Command(BaseCommand):
+    help = "Time title prefix lookups against an in-memory index of synthetic titles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=100_000)
+        parser.add_argument("--lookups", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        words = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 9))) for _ in range(5000)]
+        titles = [" ".join(rng.choices(words, k=rng.randint(3, 8))).capitalize() for _ in range(options["titles"])]
+
+        start = time.perf_counter()
+        index = PrefixIndex((key, (pk, title)) for pk, title in enumerate(titles) for key in title_keys(title))
+        built = time.perf_counter() - start
+        self.stdout.write(f"{options['titles']} titles, {len(index.entries)} keys, built in {built:.2f}s")
+
+        for length in (1, 2, 3, 5):
+            prefixes = [rng.choice(words)[:length] for _ in range(options["lookups"])]
+            samples = []
+            for prefix in prefixes:
+                start = time.perf_counter()
+                index.search(prefix, 8)
+                samples.append((time.perf_counter() - start) * 1_000_000)
+            samples.sort()
+            self.stdout.write(
+                f"{length}-char prefix  p50={samples[len(samples) // 2]:7.1f}us  "
+                f"p99={samples[int(len(samples) * 0.99)]:7.1f}us  mean={statistics.fmean(samples):7.1f}us"
+            )
+
+        start = time.perf_counter()
+        index.add(title_keys("A freshly published title"), (len(titles), "A freshly published title"))
+        self.stdout.write(f"incremental insert: {(time.perf_counter() - start) * 1_000_000:.0f}us")
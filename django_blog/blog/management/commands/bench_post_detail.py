@@ -0,0 +1,73 @@
+# blog/management/commands/bench_post_detail.py
+
+import time
+from contextlib import nullcontext
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from blog.models import Comment, Post
+
+UNCACHED = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Requests/second of the post detail page with and without fragment caching."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--comments", type=int, default=50)
+        parser.add_argument("--requests", type=int, default=500)
+
+    def handle(self, *args, **options):
+        # Everything written here is rolled back at the end.
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, options):
+        author = User.objects.create_user(username="bench-detail-author")
+        commenters = [User.objects.create_user(username=f"bench-detail-{i}") for i in range(10)]
+        post = Post.objects.create(title="Benchmark post", content="Lorem ipsum " * 200, author=author)
+        post.tags.add("bench", "django", "caching")
+        Comment.objects.bulk_create([
+            Comment(post=post, author=commenters[i % len(commenters)], content="A comment. " * 20)
+            for i in range(options["comments"])
+        ])
+
+        url = reverse("post-detail", kwargs={"pk": post.pk})
+        self.stdout.write(f"{options['comments']} comments, {options['requests']} requests per run")
+        for label, viewer, caches in (
+            ("anonymous, uncached", None, UNCACHED),
+            ("anonymous, cached", None, None),
+            ("commenter, uncached", commenters[0], UNCACHED),
+            ("commenter, cached", commenters[0], None),
+        ):
+            client = Client(HTTP_HOST="localhost")
+            if viewer is not None:
+                client.force_login(viewer)
+            with override_settings(CACHES=caches) if caches else nullcontext():
+                cache.clear()
+                client.get(url)
+                # The test client resets connection.queries on every request.
+                queries = []
+                with connection.execute_wrapper(lambda execute, sql, *args: queries.append(sql) or execute(sql, *args)):
+                    client.get(url)
+                start = time.perf_counter()
+                for _ in range(options["requests"]):
+                    client.get(url)
+                elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"{label:<22} {options['requests'] / elapsed:8.0f} req/s  "
+                f"{len(queries):2d} queries/request"
+            )
@@ -0,0 +1,13 @@
+# blog/management/commands/rebuild_tag_stats.py
+
+from django.core.management.base import BaseCommand
+
+from blog import tagstats
+
+
+class Command(BaseCommand):
+    help = "Recount the posts of every tag (TagStat) from scratch."
+
+    def handle(self, *args, **options):
+        counted = tagstats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Counted posts for {counted} tag(s)."))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:35
+
+from django.db import migrations
+
+# Must match blog.search.FTS_TABLE. A migration runs against historical
+# models only, so it cannot rely on today's blog.search.
+FTS_TABLE = "blog_post_search"
+
+
+def create_fts_table(apps, schema_editor):
+    """Create and fill the FTS5 search index when running on SQLite."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        "title, content, tags, tokenize = 'porter unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, content, tags) "
+        "SELECT p.id, p.title, p.content, COALESCE(("
+        "  SELECT group_concat(t.name, ' ') FROM taggit_taggeditem ti"
+        "  JOIN taggit_tag t ON t.id = ti.tag_id"
+        "  JOIN django_content_type ct ON ct.id = ti.content_type_id"
+        "  WHERE ct.app_label = 'blog' AND ct.model = 'post' AND ti.object_id = p.id"
+        "), '') FROM blog_post p"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_created_idx'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def count_tags(apps, schema_editor):
+    """Fill TagStat from the existing tagged posts (mirrors blog.tagstats.rebuild)."""
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Post = apps.get_model('blog', 'Post')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    TagStat = apps.get_model('blog', 'TagStat')
+
+    post_type = ContentType.objects.filter(app_label='blog', model='post').first()
+    if post_type is None:
+        return
+    created = dict(Post.objects.values_list('pk', 'created_at'))
+    stats = {}
+    items = TaggedItem.objects.filter(content_type=post_type).values_list('tag_id', 'object_id')
+    for tag_id, post_id in items.iterator():
+        if post_id not in created:
+            continue
+        stat = stats.setdefault(tag_id, TagStat(tag_id=tag_id, post_count=0, last_post_at=created[post_id]))
+        stat.post_count += 1
+        stat.last_post_at = max(stat.last_post_at, created[post_id])
+    TagStat.objects.bulk_create(stats.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_post_search'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStat',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stat', serialize=False, to='taggit.tag')),
+                ('post_count', models.PositiveIntegerField()),
+                ('last_post_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-post_count'], name='blog_tagstat_count_idx')],
+            },
+        ),
+        migrations.RunPython(count_tags, migrations.RunPython.noop),
+    ]
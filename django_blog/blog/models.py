@@ -6,6 +6,7 @@ from django.urls import reverse
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from taggit.managers import TaggableManager
+from taggit.models import Tag
 
 
 class Profile(models.Model):
@@ -39,6 +40,10 @@ class Post(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Keyset pagination of the post lists (blog/pagination.py).
+            models.Index(fields=["-created_at", "-id"], name="blog_post_created_idx"),
+        ]
 
     def __str__(self):
         return self.title
@@ -59,3 +64,25 @@ class Comment(models.Model):
 
     def __str__(self):
         return f"Comment by {self.author} on {self.post}"
+
+
+class TagStat(models.Model):
+    """
+    How many posts carry a tag and when the newest of them was written.
+
+    Maintained by blog/tagstats.py; only tags with at least one post have
+    a row, so a row's existence is also the "does this tag page exist" check.
+    """
+
+    tag = models.OneToOneField(Tag, on_delete=models.CASCADE, primary_key=True, related_name="stat")
+    post_count = models.PositiveIntegerField()
+    last_post_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # Popular tags (blog/tagstats.py).
+            models.Index(fields=["-post_count"], name="blog_tagstat_count_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.tag.name} ({self.post_count})"
@@ -0,0 +1,53 @@
+# blog/pagination.py
+
+from datetime import datetime
+
+from django.db.models import Q
+from django.http import Http404
+
+
+class KeysetPaginationMixin:
+    """
+    ListView pagination by the (created_at, id) of the last post shown.
+
+    ``?after=<cursor>`` continues below that post, so every page is one
+    range scan over the blog_post_created_idx index: no COUNT(*) and no
+    OFFSET, and deep pages cost the same as the first one. The template
+    gets ``next_cursor`` (None on the last page) and ``is_paginated``.
+    """
+
+    paginate_by = 10
+    # post_list.html builds its "Older posts" link with this name.
+    cursor_param = "after"
+
+    def paginate_queryset(self, queryset, page_size):
+        key = self.decode_cursor(self.request.GET.get(self.cursor_param))
+        if key is not None:
+            created_at, pk = key
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+        posts = list(queryset.order_by("-created_at", "-pk")[:page_size + 1])
+        has_next = len(posts) > page_size
+        posts = posts[:page_size]
+
+        self.next_cursor = self.encode_cursor(posts[-1]) if has_next else None
+        return None, None, posts, has_next or key is not None
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["next_cursor"] = self.next_cursor
+        return context
+
+    @staticmethod
+    def encode_cursor(post):
+        return f"{post.created_at.isoformat()}_{post.pk}"
+
+    @staticmethod
+    def decode_cursor(cursor):
+        if not cursor:
+            return None
+        try:
+            created_at, pk = cursor.rsplit("_", 1)
+            return datetime.fromisoformat(created_at), int(pk)
+        except ValueError:
+            raise Http404("Invalid page cursor.")
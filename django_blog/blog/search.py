@@ -0,0 +1,220 @@
+# blog/search.py
+
+"""
+Full-text search over post titles, content and tags.
+
+The index lives in a search backend, chosen with the BLOG_SEARCH_BACKEND
+setting (a dotted path). The default, FTS5Backend, keeps an SQLite FTS5
+table with one row per post, stemmed with the Porter stemmer (so "running"
+finds "runs") and ranked with BM25, title matches weighing most. Other
+databases can plug in their own engine by implementing the same methods;
+BasicBackend works anywhere but scans the table.
+
+blog/signals.py keeps the index current as posts and their tags change.
+``python manage.py rebuild_search_index`` rebuilds it from scratch, e.g.
+after bulk imports.
+
+Every word of a query must match; a word ending in ``*`` matches as a
+prefix. Results carry highlighted copies of the title and a snippet of the
+content, already HTML-escaped and safe to render. Only the best MAX_RESULTS
+matches can be paged through, so a broad query never counts or skips past
+more rows than that.
+"""
+
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+from taggit.models import TaggedItem
+
+from .models import Post
+
+# Created by migration 0007 on SQLite.
+FTS_TABLE = "blog_post_search"
+
+# BM25 weights of the title, content and tags columns.
+WEIGHTS = (3.0, 1.0, 2.0)
+SNIPPET_WORDS = 24
+MAX_QUERY_WORDS = 8
+# 50 pages of 10.
+MAX_RESULTS = 500
+
+# Control characters FTS5 wraps matches in; they cannot occur in a word, so
+# they survive escaping and become <mark> afterwards.
+_OPEN, _CLOSE = "\x02", "\x03"
+_QUERY_WORD = re.compile(r"(\w+)(\*?)")
+
+Hit = namedtuple("Hit", ["post_id", "title", "snippet"])
+
+
+def parse_query(query):
+    """``(word, is_prefix)`` pairs in ``query``; punctuation is ignored.
+
+    Copied from social_media_api's posts.search.parse_query rather than
+    shared, since the projects deploy separately; keep the query syntax of
+    the two in step.
+    """
+    words = []
+    for word, star in _QUERY_WORD.findall(query.lower()):
+        if (word, bool(star)) not in words:
+            words.append((word, bool(star)))
+    return words[:MAX_QUERY_WORDS]
+
+
+def highlight(text):
+    """Escape ``text`` and turn the backend's match markers into <mark> tags."""
+    return mark_safe(escape(text).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>"))
+
+
+def _tag_names(post_ids):
+    """{post id: space-separated tag names} for ``post_ids``."""
+    rows = TaggedItem.objects.filter(
+        content_type=ContentType.objects.get_for_model(Post),
+        object_id__in=post_ids,
+    ).values_list("object_id", "tag__name")
+    names = {}
+    for post_id, name in rows:
+        names.setdefault(post_id, []).append(name)
+    return {post_id: " ".join(tags) for post_id, tags in names.items()}
+
+
+class FTS5Backend:
+    def index(self, post_ids):
+        post_ids = list(post_ids)
+        posts = Post.objects.filter(pk__in=post_ids).values_list("pk", "title", "content")
+        tags = _tag_names(post_ids)
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in post_ids])
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content, tags) VALUES (%s, %s, %s, %s)",
+                [(pk, title, content, tags.get(pk, "")) for pk, title, content in posts],
+            )
+
+    def remove(self, post_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(pk,) for pk in post_ids])
+
+    def rebuild(self, batch_size=2000):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        ids = list(Post.objects.order_by("pk").values_list("pk", flat=True))
+        for start in range(0, len(ids), batch_size):
+            self.index(ids[start:start + batch_size])
+        return len(ids)
+
+    def _match(self, words):
+        # A quoted word is a plain FTS5 string, so words like NOT, NEAR or
+        # "tags" (a column name) in the search box are searched for, not
+        # obeyed.
+        return " ".join(f'"{word}"' + ("*" if prefix else "") for word, prefix in words)
+
+    def count(self, words, limit):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM (SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT %s)",
+                [self._match(words), limit],
+            )
+            return cursor.fetchone()[0]
+
+    def search(self, words, offset, limit):
+        # Ascending bm25() puts the best match first; the newest post wins
+        # a tie.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, highlight({FTS_TABLE}, 0, %s, %s), "
+                f"snippet({FTS_TABLE}, 1, %s, %s, '…', %s) "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, %s, %s, %s), rowid DESC LIMIT %s OFFSET %s",
+                [_OPEN, _CLOSE, _OPEN, _CLOSE, SNIPPET_WORDS, self._match(words), *WEIGHTS, limit, offset],
+            )
+            return [Hit(*row) for row in cursor.fetchall()]
+
+
+class BasicBackend:
+    """Unindexed fallback: regex word matches on every column, newest first, no stemming."""
+
+    def index(self, post_ids):
+        pass
+
+    def remove(self, post_ids):
+        pass
+
+    def rebuild(self, batch_size=2000):
+        return 0
+
+    def _queryset(self, words):
+        # PostgreSQL spells the word boundary \y; SQLite (Python re) and MySQL \b.
+        boundary = r"\y" if connection.vendor == "postgresql" else r"\b"
+        queryset = Post.objects.all()
+        for word, prefix in words:
+            pattern = boundary + re.escape(word) + ("" if prefix else boundary)
+            queryset = queryset.filter(
+                Q(title__iregex=pattern) | Q(content__iregex=pattern) | Q(tags__name__iregex=pattern)
+            )
+        return queryset.distinct()
+
+    def count(self, words, limit):
+        return self._queryset(words)[:limit].count()
+
+    def search(self, words, offset, limit):
+        posts = self._queryset(words).order_by("-created_at", "-pk")[offset:offset + limit]
+        return [Hit(post.pk, post.title, post.content[:200]) for post in posts]
+
+
+def get_backend():
+    path = getattr(settings, "BLOG_SEARCH_BACKEND", "blog.search.FTS5Backend")
+    return import_string(path)()
+
+
+class SearchResults:
+    """
+    Lazy, sliceable results of one query, for django.core.paginator.Paginator.
+
+    Slicing runs the search for that page only and returns Post objects
+    (with author and tags loaded) carrying ``search_title`` and
+    ``search_snippet``. Only the best MAX_RESULTS are counted and paged;
+    ``truncated`` says whether there were more.
+    """
+
+    def __init__(self, query, backend=None):
+        self.words = parse_query(query)
+        self.backend = backend or get_backend()
+        self.truncated = False
+
+    def count(self):
+        if not self.words:
+            return 0
+        if not hasattr(self, "_count"):
+            found = self.backend.count(self.words, MAX_RESULTS + 1)
+            self.truncated = found > MAX_RESULTS
+            self._count = min(found, MAX_RESULTS)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if not isinstance(page, slice):
+            raise TypeError("SearchResults only supports slicing.")
+        if not self.words:
+            return []
+        offset = page.start or 0
+        stop = min(page.stop, MAX_RESULTS)
+        if offset >= stop:
+            return []
+        hits = self.backend.search(self.words, offset, stop - offset)
+        posts = Post.objects.select_related("author").prefetch_related("tags").in_bulk([hit.post_id for hit in hits])
+        results = []
+        for hit in hits:
+            post = posts.get(hit.post_id)
+            if post is not None:
+                post.search_title = highlight(hit.title)
+                post.search_snippet = highlight(hit.snippet)
+                results.append(post)
+        return results
@@ -0,0 +1,148 @@
+# blog/signals.py
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from taggit.models import Tag, TaggedItem
+
+from . import search, tagstats
+from .autocomplete import suggestions
+from .cache import invalidate_post
+from .models import Comment, Post
+
+
+# ---------------------------
+# SEARCH INDEX
+# ---------------------------
+
+def _tagged_post_ids(tag):
+    return list(
+        TaggedItem.objects.filter(
+            tag=tag, content_type=ContentType.objects.get_for_model(Post)
+        ).values_list("object_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {"title", "content"} & set(update_fields):
+        search.get_backend().index([instance.pk])
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove([instance.pk])
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def reindex_post_tags(sender, instance, action, **kwargs):
+    if isinstance(instance, Post) and action in ("post_add", "post_remove", "post_clear"):
+        search.get_backend().index([instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+def refresh_renamed_tag(sender, instance, created, **kwargs):
+    if not created:
+        post_ids = _tagged_post_ids(instance)
+        search.get_backend().index(post_ids)
+        invalidate_post(*post_ids)
+
+
+@receiver(pre_delete, sender=Tag)
+def refresh_deleted_tag(sender, instance, **kwargs):
+    # The tag's TaggedItems are gone once it is deleted.
+    post_ids = _tagged_post_ids(instance)
+    invalidate_post(*post_ids)
+    transaction.on_commit(lambda: search.get_backend().index(post_ids))
+
+
+# ---------------------------
+# POST DETAIL FRAGMENTS
+# ---------------------------
+# Tag renames and deletes are handled with the search index above.
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post_fragments(sender, instance, **kwargs):
+    invalidate_post(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment_fragments(sender, instance, **kwargs):
+    invalidate_post(instance.post_id)
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def invalidate_tag_fragments(sender, instance, action, **kwargs):
+    if isinstance(instance, Post) and action in ("post_add", "post_remove", "post_clear"):
+        invalidate_post(instance.pk)
+
+
+# ---------------------------
+# TAG STATISTICS
+# ---------------------------
+# Recounted inside the changing transaction, so the counts commit or roll
+# back with it. A deleted tag takes its TagStat row with it (CASCADE).
+
+def _post_tag_ids(post):
+    return list(post.tags.values_list("pk", flat=True))
+
+
+def _recount(tag_ids):
+    tag_ids = set(tag_ids)
+    tagstats.refresh(tag_ids)
+    # Tags that gained their first post or lost their last come and go
+    # from the search suggestions.
+    if tag_ids:
+        transaction.on_commit(lambda: suggestions.tags_recounted(tag_ids))
+
+
+@receiver(m2m_changed, sender=TaggedItem)
+def count_post_tags(sender, instance, action, pk_set, **kwargs):
+    if not isinstance(instance, Post):
+        return
+    if action in ("post_add", "post_remove"):
+        _recount(pk_set)
+    elif action == "pre_clear":
+        instance._cleared_tag_ids = _post_tag_ids(instance)
+    elif action == "post_clear":
+        _recount(instance.__dict__.pop("_cleared_tag_ids", ()))
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    # The post's TaggedItems are deleted before post_delete is sent.
+    instance._deleted_tag_ids = _post_tag_ids(instance)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post_tags(sender, instance, **kwargs):
+    _recount(instance.__dict__.pop("_deleted_tag_ids", ()))
+
+
+# ---------------------------
+# AUTOCOMPLETE
+# ---------------------------
+
+# Patched on commit so a rolled-back change is never suggested.
+
+@receiver(post_save, sender=Post)
+def suggest_post(sender, instance, **kwargs):
+    transaction.on_commit(lambda: suggestions.post_saved(instance))
+
+
+@receiver(post_delete, sender=Post)
+def unsuggest_post(sender, instance, **kwargs):
+    post_id = instance.pk
+    transaction.on_commit(lambda: suggestions.post_deleted(post_id))
+
+
+@receiver(post_save, sender=Tag)
+def suggest_tag(sender, instance, **kwargs):
+    transaction.on_commit(lambda: suggestions.tag_saved(instance))
+
+
+@receiver(post_delete, sender=Tag)
+def unsuggest_tag(sender, instance, **kwargs):
+    tag_id = instance.pk
+    transaction.on_commit(lambda: suggestions.tag_deleted(tag_id))
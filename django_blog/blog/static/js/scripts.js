@@ -1,4 +1,33 @@
 // Basic example script to demonstrate dynamic behavior
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Blog page loaded');
-});
\ No newline at end of file
+});
+
+// Search-as-you-type: fill the search box's datalist from /search/suggest/
+document.addEventListener('DOMContentLoaded', function() {
+    const input = document.querySelector('input[data-suggest-url]');
+    if (!input) return;
+    const list = document.getElementById(input.getAttribute('list'));
+    let timer = null;
+
+    input.addEventListener('input', function() {
+        clearTimeout(timer);
+        timer = setTimeout(function() {
+            const q = input.value.trim();
+            if (!q) {
+                list.innerHTML = '';
+                return;
+            }
+            fetch(input.dataset.suggestUrl + '?q=' + encodeURIComponent(q))
+                .then(function(response) { return response.json(); })
+                .then(function(data) {
+                    list.innerHTML = '';
+                    data.posts.concat(data.tags).forEach(function(item) {
+                        const option = document.createElement('option');
+                        option.value = item.title || item.name;
+                        list.appendChild(option);
+                    });
+                });
+        }, 150);
+    });
+});
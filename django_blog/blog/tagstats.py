@@ -0,0 +1,91 @@
+# blog/tagstats.py
+
+"""
+Per-tag post counts kept in the TagStat table.
+
+Counting posts per tag through django-taggit's generic relation means a
+join and a GROUP BY over every tagged post, so the tag cloud, the popular
+tags list and tag page lookups read TagStat instead. blog/signals.py
+calls refresh() for the tags whose posts changed (tags added, removed or
+cleared, posts deleted), inside the same transaction as the change.
+refresh() locks those tags' rows (SELECT ... FOR UPDATE; SQLite
+serializes writers anyway) before recounting them from scratch, so two
+transactions tagging different posts with the same tag count one after
+the other instead of each from its own snapshot. ``manage.py
+rebuild_tag_stats`` recounts every tag.
+"""
+
+import math
+
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from taggit.models import Tag
+
+from .models import Post, TagStat
+
+# Font size steps of the tag cloud.
+CLOUD_WEIGHTS = 5
+
+
+def _count(posts):
+    """TagStat rows for the tags of ``posts``, one grouped query."""
+    rows = (
+        posts.values("tags")
+        .annotate(post_count=Count("pk"), last_post_at=Max("created_at"))
+        .order_by()
+    )
+    return [
+        TagStat(tag_id=row["tags"], post_count=row["post_count"], last_post_at=row["last_post_at"])
+        for row in rows
+    ]
+
+
+def _save(stats):
+    TagStat.objects.bulk_create(
+        stats,
+        update_conflicts=True,
+        unique_fields=["tag"],
+        update_fields=["post_count", "last_post_at"],
+    )
+
+
+def refresh(tag_ids):
+    """Recount the posts of ``tag_ids``; tags left without posts lose their row."""
+    tag_ids = set(tag_ids)
+    if not tag_ids:
+        return
+    with transaction.atomic():
+        if connection.features.has_select_for_update:
+            # In pk order, so concurrent refreshes cannot deadlock each other.
+            list(Tag.objects.select_for_update().filter(pk__in=tag_ids).order_by("pk").values_list("pk"))
+        stats = _count(Post.objects.filter(tags__in=tag_ids))
+        TagStat.objects.filter(tag_id__in=tag_ids - {stat.tag_id for stat in stats}).delete()
+        _save(stats)
+
+
+def rebuild():
+    """Recount every tag. Returns the number of tags with posts."""
+    stats = _count(Post.objects.filter(tags__isnull=False))
+    with transaction.atomic():
+        TagStat.objects.all().delete()
+        _save(stats)
+    return len(stats)
+
+
+def popular(limit=10):
+    """The ``limit`` tags with the most posts."""
+    return list(TagStat.objects.select_related("tag").order_by("-post_count", "tag__name")[:limit])
+
+
+def cloud():
+    """Every tag with posts, by name, each with a ``weight`` from 1 to CLOUD_WEIGHTS."""
+    stats = list(TagStat.objects.select_related("tag").order_by("tag__name"))
+    if stats:
+        # Logarithmic, so one huge tag does not shrink all the others to 1.
+        low = math.log(min(stat.post_count for stat in stats))
+        spread = math.log(max(stat.post_count for stat in stats)) - low
+        for stat in stats:
+            # Equal counts all get the middle weight.
+            share = (math.log(stat.post_count) - low) / spread if spread else 0.5
+            stat.weight = 1 + round(share * (CLOUD_WEIGHTS - 1))
+    return stats
@@ -1,8 +1,18 @@
 # blog/tests.py
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.contrib.auth.models import User
-from .models import Post
+from taggit.models import Tag
+
+from . import search, tagstats
+from .autocomplete import suggestions
+from .models import Comment, Post, TagStat
 
 class PostTests(TestCase):
     def setUp(self):
@@ -46,3 +56,319 @@ class PostTests(TestCase):
         resp = self.client.post(url, follow=True)
         self.assertRedirects(resp, reverse('posts'))
         self.assertFalse(Post.objects.filter(pk=self.post.pk).exists())
+
+
+class PostListTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="author", password="passw0rd")
+        self.posts = []
+        for i in range(25):
+            post = Post.objects.create(title=f"Post {i}", content="Content", author=self.user)
+            post.tags.add("django" if i % 2 else "python", "blog")
+            self.posts.append(post)
+        self.newest_first = [post.pk for post in reversed(self.posts)]
+
+    def collect(self, url):
+        pks, cursors = [], []
+        resp = self.client.get(url)
+        while True:
+            pks += [post.pk for post in resp.context['posts']]
+            cursor = resp.context['next_cursor']
+            if cursor is None:
+                return pks, cursors
+            cursors.append(cursor)
+            resp = self.client.get(url, {'after': cursor})
+
+    def test_list_walks_every_post_newest_first(self):
+        pks, cursors = self.collect(reverse('posts'))
+        self.assertEqual(pks, self.newest_first)
+        self.assertEqual(len(cursors), 2)
+
+    def test_page_query_count_is_constant(self):
+        # The posts (with authors), their tags and the popular tags.
+        with self.assertNumQueries(3):
+            resp = self.client.get(reverse('posts'))
+        with self.assertNumQueries(3):
+            self.client.get(reverse('posts'), {'after': resp.context['next_cursor']})
+
+    def test_tag_page_is_paginated(self):
+        pks, _ = self.collect(reverse('posts-by-tag', kwargs={'tag_slug': 'django'}))
+        tagged = [post.pk for i, post in enumerate(self.posts) if i % 2]
+        self.assertEqual(pks, tagged[::-1])
+        # Plus the tag's TagStat row.
+        with self.assertNumQueries(4):
+            self.client.get(reverse('posts-by-tag', kwargs={'tag_slug': 'django'}))
+
+    def test_invalid_cursor_is_404(self):
+        resp = self.client.get(reverse('posts'), {'after': 'garbage'})
+        self.assertEqual(resp.status_code, 404)
+
+
+class TagStatTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="author", password="passw0rd")
+        self.first = Post.objects.create(title="First", content="x", author=self.user)
+        self.second = Post.objects.create(title="Second", content="x", author=self.user)
+        self.first.tags.add("django", "python")
+        self.second.tags.add("django")
+
+    def counts(self):
+        return dict(TagStat.objects.values_list('tag__name', 'post_count'))
+
+    def test_counts_follow_tag_changes_and_deletes(self):
+        self.assertEqual(self.counts(), {'django': 2, 'python': 1})
+        self.assertEqual(TagStat.objects.get(tag__name='django').last_post_at, self.second.created_at)
+
+        self.second.tags.add("python")
+        self.first.tags.remove("django")
+        self.assertEqual(self.counts(), {'django': 1, 'python': 2})
+
+        self.second.delete()
+        self.assertEqual(self.counts(), {'python': 1})
+        self.assertEqual(TagStat.objects.get(tag__name='python').last_post_at, self.first.created_at)
+
+        self.first.tags.clear()
+        self.assertEqual(self.counts(), {})
+
+        self.first.tags.add("django")
+        Tag.objects.get(name="django").delete()
+        self.assertEqual(self.counts(), {})
+
+    def test_unused_tag_page_is_404(self):
+        Tag.objects.create(name="unused", slug="unused")
+        for slug in ('unused', 'missing'):
+            resp = self.client.get(reverse('posts-by-tag', kwargs={'tag_slug': slug}))
+            self.assertEqual(resp.status_code, 404)
+        resp = self.client.get(reverse('posts-by-tag', kwargs={'tag_slug': 'python'}))
+        self.assertEqual(resp.context['active_tag'].name, 'python')
+        self.assertEqual([post.pk for post in resp.context['posts']], [self.first.pk])
+
+    def test_tag_cloud_and_popular_tags(self):
+        with self.assertNumQueries(1):
+            resp = self.client.get(reverse('tag-cloud'))
+        self.assertEqual([(stat.tag.name, stat.weight) for stat in resp.context['tags']],
+                         [('django', 5), ('python', 1)])
+        resp = self.client.get(reverse('posts'))
+        self.assertEqual([stat.tag.name for stat in resp.context['popular_tags']], ['django', 'python'])
+
+        self.first.tags.add("rare")
+        self.assertEqual({stat.tag.name: stat.weight for stat in tagstats.cloud()},
+                         {'django': 5, 'python': 1, 'rare': 1})
+        self.second.delete()
+        self.assertEqual({stat.tag.name: stat.weight for stat in tagstats.cloud()},
+                         {'django': 3, 'python': 3, 'rare': 3})
+
+    def test_rebuild_tag_stats(self):
+        TagStat.objects.all().delete()
+        call_command('rebuild_tag_stats', stdout=StringIO())
+        self.assertEqual(self.counts(), {'django': 2, 'python': 1})
+
+
+class PostSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="author", password="passw0rd")
+        self.in_title = Post.objects.create(title="Running Django", content="Notes.", author=self.user)
+        self.in_content = Post.objects.create(title="Notes", content="She runs django daily.", author=self.user)
+        self.tagged = Post.objects.create(title="Cooking", content="Pasta.", author=self.user)
+        self.tagged.tags.add("recipes")
+
+    def search(self, q, **params):
+        return self.client.get(reverse('post-search'), {'q': q, **params})
+
+    def pks(self, q):
+        return [post.pk for post in self.search(q).context['posts']]
+
+    def test_stemmed_matches_ranked_title_first(self):
+        self.assertEqual(self.pks('run'), [self.in_title.pk, self.in_content.pk])
+        self.assertEqual(self.pks('runs django'), [self.in_title.pk, self.in_content.pk])
+
+    def test_prefix_and_tag_matches(self):
+        self.assertEqual(self.pks('djan*'), [self.in_title.pk, self.in_content.pk])
+        self.assertEqual(self.pks('recipes'), [self.tagged.pk])
+
+    def test_empty_query_finds_nothing(self):
+        resp = self.search('')
+        self.assertEqual(list(resp.context['posts']), [])
+        self.assertContains(resp, 'No search query provided.')
+
+    def test_matches_are_highlighted_and_escaped(self):
+        Post.objects.create(title="<b>Unsafe</b> title", content="x", author=self.user)
+        resp = self.search('unsafe')
+        self.assertContains(resp, '&lt;b&gt;<mark>Unsafe</mark>&lt;/b&gt; title', html=False)
+        self.assertContains(self.search('daily'), '<mark>daily</mark>', html=False)
+
+    def test_index_follows_edits_tags_and_deletes(self):
+        self.in_content.title = "Pasta night"
+        self.in_content.save()
+        self.assertEqual(self.pks('pasta'), [self.in_content.pk, self.tagged.pk])
+
+        self.in_content.tags.add("recipes")
+        self.tagged.tags.remove("recipes")
+        self.assertEqual(self.pks('recipes'), [self.in_content.pk])
+
+        self.in_content.delete()
+        self.assertEqual(self.pks('pasta'), [self.tagged.pk])
+
+    def test_results_are_paginated(self):
+        for i in range(12):
+            Post.objects.create(title=f"Paged {i}", content="x", author=self.user)
+        first = self.search('paged')
+        second = self.search('paged', page=2)
+        self.assertEqual(first.context['page_obj'].paginator.count, 12)
+        self.assertEqual(len(first.context['posts']) + len(second.context['posts']), 12)
+
+    def test_deep_pages_are_capped(self):
+        for i in range(12):
+            Post.objects.create(title=f"Paged {i}", content="x", author=self.user)
+        with mock.patch.object(search, 'MAX_RESULTS', 5):
+            first = self.search('paged')
+            beyond = self.search('paged', page=9)
+        self.assertEqual(first.context['page_obj'].paginator.count, 5)
+        self.assertTrue(first.context['truncated'])
+        self.assertContains(first, 'Best 5 results')
+        self.assertEqual(beyond.context['page_obj'].number, 1)
+
+    @override_settings(BLOG_SEARCH_BACKEND='blog.search.BasicBackend')
+    def test_basic_backend_matches_words_and_prefixes(self):
+        self.assertEqual(self.pks('django'), [self.in_content.pk, self.in_title.pk])
+        self.assertEqual(self.pks('djan'), [])
+        self.assertEqual(self.pks('djan*'), [self.in_content.pk, self.in_title.pk])
+        self.assertEqual(self.pks('ango*'), [])
+        self.assertEqual(self.pks('recipes'), [self.tagged.pk])
+
+    def test_rebuild_search_index(self):
+        Post.objects.bulk_create([Post(title="Imported", content="x", author=self.user)])
+        self.assertEqual(self.pks('imported'), [])
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.pks('imported')), 1)
+
+
+class PostSuggestTests(TestCase):
+    def setUp(self):
+        suggestions.reset()
+        self.user = User.objects.create_user(username="author", password="passw0rd")
+        self.post = Post.objects.create(title="Django Tips", content="x", author=self.user)
+        self.post.tags.add("Databases")
+
+    def suggest(self, q):
+        return self.client.get(reverse('post-suggest'), {'q': q}).json()
+
+    def titles(self, q):
+        return [item['title'] for item in self.suggest(q)['posts']]
+
+    def test_matches_any_title_word_and_tags(self):
+        self.assertEqual(self.titles('dj'), ["Django Tips"])
+        self.assertEqual(self.titles('TI'), ["Django Tips"])
+        self.assertEqual(self.titles('django t'), ["Django Tips"])
+        self.assertEqual(self.titles('jango'), [])
+        self.assertEqual(self.suggest('data')['tags'], [{'name': "Databases", 'url': '/tags/databases/'}])
+
+    def test_index_is_loaded_once(self):
+        with self.assertNumQueries(2):
+            self.suggest('d')
+        with self.assertNumQueries(0):
+            self.suggest('t')
+
+    def test_index_follows_posts_and_tags(self):
+        self.suggest('d')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = "Flask Tips"
+            self.post.save()
+            Post.objects.create(title="Deploying", content="x", author=self.user)
+            self.post.tags.add("Docker")
+        self.assertEqual(self.titles('d'), ["Deploying"])
+        self.assertEqual(self.titles('fl'), ["Flask Tips"])
+        self.assertEqual([tag['name'] for tag in self.suggest('d')['tags']], ["Databases", "Docker"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.get(title="Deploying").tags.add("Databases")
+            self.post.delete()
+            Tag.objects.get(name="Docker").delete()
+        self.assertEqual(self.titles('fl'), [])
+        self.assertEqual([tag['name'] for tag in self.suggest('d')['tags']], ["Databases"])
+
+    def test_only_tags_in_use_are_suggested(self):
+        Tag.objects.create(name="Drafts", slug="drafts")
+        self.assertEqual([tag['name'] for tag in self.suggest('d')['tags']], ["Databases"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.add("Drafts")
+        self.assertEqual([tag['name'] for tag in self.suggest('d')['tags']], ["Databases", "Drafts"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.tags.clear()
+        self.assertEqual(self.suggest('d')['tags'], [])
+
+    def test_lookups_are_served_during_a_reload(self):
+        self.suggest('d')
+        suggestions._loaded_at -= 10 ** 6
+        with suggestions._load_lock:
+            # Another thread holds the reload: answer from the stale arrays.
+            with self.assertNumQueries(0):
+                self.assertEqual(self.titles('dj'), ["Django Tips"])
+
+        def rename_midway(execute, sql, params, many, context):
+            # A patch from another request while the reload queries run; it
+            # would deadlock if the reload held the lookup lock.
+            suggestions.post_saved(Post(pk=self.post.pk, title="Flask Tips"))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(rename_midway):
+            suggestions._reload()
+        self.assertEqual(self.titles('fl'), ["Flask Tips"])
+
+    def test_empty_query_suggests_nothing(self):
+        self.assertEqual(self.suggest(' '), {'posts': [], 'tags': []})
+
+
+class PostDetailCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="author", password="passw0rd")
+        self.commenter = User.objects.create_user(username="commenter", password="passw0rd")
+        self.post = Post.objects.create(title="Cached post", content="Body", author=self.user)
+        self.post.tags.add("django")
+        for i in range(5):
+            Comment.objects.create(post=self.post, author=self.commenter, content=f"Comment {i}")
+        self.url = reverse('post-detail', kwargs={'pk': self.post.pk})
+
+    def test_repeat_views_skip_tags_and_comments(self):
+        # Post with author, commenter ids, tags, comments with authors.
+        with self.assertNumQueries(4):
+            first = self.client.get(self.url)
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertEqual(first.content, second.content)
+
+    def test_changes_invalidate_fragments(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = "Renamed post"
+            self.post.save()
+            self.post.tags.add("caching")
+            Comment.objects.create(post=self.post, author=self.user, content="Fresh comment")
+
+        resp = self.client.get(self.url)
+        self.assertContains(resp, "Renamed post")
+        self.assertContains(resp, "caching")
+        self.assertContains(resp, "Fresh comment")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tag.objects.get(name="caching").delete()
+        self.assertNotContains(self.client.get(self.url), "caching")
+
+    def test_edit_links_follow_the_viewer(self):
+        edit_post = reverse('post-update', kwargs={'pk': self.post.pk})
+        edit_comment = reverse('comment-update', kwargs={'pk': self.post.comments.first().pk})
+        self.assertNotContains(self.client.get(self.url), edit_post)
+
+        self.client.login(username='author', password='passw0rd')
+        resp = self.client.get(self.url)
+        self.assertContains(resp, edit_post)
+        self.assertNotContains(resp, edit_comment)
+
+        self.client.login(username='commenter', password='passw0rd')
+        resp = self.client.get(self.url)
+        self.assertNotContains(resp, edit_post)
+        self.assertContains(resp, edit_comment)
@@ -24,9 +24,11 @@ urlpatterns = [
     path("comment/<int:pk>/update/", views.CommentUpdateView.as_view(), name="comment-update"),
     path("comment/<int:pk>/delete/", views.CommentDeleteView.as_view(), name="comment-delete"),
 
-    # Tag filtering
+    # Tags
+    path("tags/", views.tag_cloud, name="tag-cloud"),
     path("tags/<slug:tag_slug>/", views.PostByTagListView.as_view(), name="posts-by-tag"),
 
     # Search
     path("search/", views.post_search, name="post-search"),
+    path("search/suggest/", views.post_suggest, name="post-suggest"),
 ]
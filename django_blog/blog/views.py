@@ -1,6 +1,7 @@
 # blog/views.py
 
 from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
 from django.contrib.auth import login, logout
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth.decorators import login_required
@@ -8,10 +9,17 @@ from django.contrib import messages
 from django.urls import reverse, reverse_lazy
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.contrib.contenttypes.models import ContentType
+from taggit.models import TaggedItem
 
-from .models import Profile, Post, Comment
+from .models import Profile, Post, Comment, TagStat
 from .forms import CustomUserCreationForm, UserUpdateForm, PostForm, CommentForm
+from .pagination import KeysetPaginationMixin
+from .search import SearchResults
+from .autocomplete import suggestions
+from .cache import fragment_state, fragment_timeout
+from . import tagstats
 
 
 # ---------------------------
@@ -73,11 +81,19 @@ def profile_view(request):
 # POSTS
 # ---------------------------
 
-class PostListView(ListView):
+class PostListView(KeysetPaginationMixin, ListView):
     model = Post
     template_name = "blog/post_list.html"
     context_object_name = "posts"
-    ordering = ["-created_at"]
+
+    def get_queryset(self):
+        # Author and tags are shown for every post: 2 queries per page.
+        return Post.objects.select_related("author").prefetch_related("tags")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["popular_tags"] = tagstats.popular()
+        return context
 
 
 class PostDetailView(DetailView):
@@ -85,9 +101,22 @@ class PostDetailView(DetailView):
     template_name = "blog/post_detail.html"
     context_object_name = "post"
 
+    def get_queryset(self):
+        return Post.objects.select_related("author")
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        post, user = self.object, self.request.user
+        version, commenters = fragment_state(post.pk)
+
         context["comment_form"] = CommentForm()
+        # Keys of the cached fragments in post_detail.html.
+        context["fragment_timeout"] = fragment_timeout()
+        context["fragment_version"] = version
+        context["is_author"] = user.pk == post.author_id
+        context["comment_viewer"] = user.pk if user.pk in commenters else None
+        # Lazy: only evaluated when the comment fragment is not cached.
+        context["comments"] = post.comments.select_related("author")
         return context
 
 
@@ -170,16 +199,32 @@ class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 
 # ---------------------------
-# TAG FILTER VIEW
+# TAGS
 # ---------------------------
 
-class PostByTagListView(ListView):
-    model = Post
-    template_name = "blog/post_list.html"
-    context_object_name = "posts"
+class PostByTagListView(PostListView):
+    def get(self, request, *args, **kwargs):
+        # Only tags with posts have a TagStat row: unknown and unused tags are 404.
+        self.tag_stat = get_object_or_404(TagStat.objects.select_related("tag"), tag__slug=kwargs["tag_slug"])
+        return super().get(request, *args, **kwargs)
 
     def get_queryset(self):
-        return Post.objects.filter(tags__slug=self.kwargs["tag_slug"]).distinct()
+        # A subquery on the tag's TaggedItems rather than a join on the tag
+        # slug, so no DISTINCT is needed.
+        tagged = TaggedItem.objects.filter(
+            tag_id=self.tag_stat.tag_id, content_type=ContentType.objects.get_for_model(Post)
+        ).values("object_id")
+        return super().get_queryset().filter(pk__in=tagged)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["active_tag"] = self.tag_stat.tag
+        context["tag_stat"] = self.tag_stat
+        return context
+
+
+def tag_cloud(request):
+    return render(request, "blog/tag_cloud.html", {"tags": tagstats.cloud()})
 
 
 # ---------------------------
@@ -187,14 +232,35 @@ class PostByTagListView(ListView):
 # ---------------------------
 
 def post_search(request):
-    query = request.GET.get("q", "")
-    posts = Post.objects.filter(
-        Q(title__icontains=query) |
-        Q(content__icontains=query) |
-        Q(tags__name__icontains=query)
-    ).distinct()
+    query = request.GET.get("q", "").strip()
+    # An empty query finds nothing rather than every post.
+    results = SearchResults(query)
+    paginator = Paginator(results, 10)
+    page = paginator.get_page(request.GET.get("page"))
 
     return render(request, "blog/search_results.html", {
         "query": query,
-        "posts": posts,
+        "posts": page.object_list,
+        "page_obj": page,
+        "truncated": results.truncated,
+    })
+
+
+def post_suggest(request):
+    """JSON title and tag suggestions for the search box, e.g. ``?q=dja``."""
+    try:
+        limit = max(1, min(int(request.GET.get("limit", 8)), 20))
+    except ValueError:
+        limit = 8
+    titles, tags = suggestions.suggest(request.GET.get("q", ""), limit)
+
+    return JsonResponse({
+        "posts": [
+            {"id": pk, "title": title, "url": reverse("post-detail", kwargs={"pk": pk})}
+            for pk, title in titles
+        ],
+        "tags": [
+            {"name": name, "url": reverse("posts-by-tag", kwargs={"tag_slug": slug})}
+            for name, slug in tags
+        ],
     })
@@ -117,3 +117,15 @@ LOGOUT_REDIRECT_URL = "login"
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Post search engine (blog/search.py). FTS5Backend needs SQLite; other
+# databases can use blog.search.BasicBackend or a backend of their own.
+BLOG_SEARCH_BACKEND = "blog.search.FTS5Backend"
+
+# Seconds before a process reloads its in-memory search suggestions
+# (blog/autocomplete.py) to pick up changes made by other processes.
+BLOG_AUTOCOMPLETE_TTL = 300
+
+# Seconds the post detail fragments (blog/cache.py) stay cached. Edits,
+# comments and tag changes invalidate them immediately.
+BLOG_FRAGMENT_CACHE_TIMEOUT = 600
@@ -0,0 +1,107 @@
+"""
+Token authentication without a database lookup on every request.
+
+CachedTokenAuthentication keeps recently used ``(user, token)`` pairs in a
+bounded in-process LRU, optionally backed by a shared Django cache so that
+other workers can skip the query too. Entries expire after
+TOKEN_AUTH_CACHE_TTL seconds and are evicted immediately (in this process
+and in the shared tier) when a token is deleted or its user is saved,
+which covers deactivation. Other processes' local entries only expire by
+TTL, so keep it short.
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class TokenLRU:
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires = time.monotonic() + _setting("TOKEN_AUTH_CACHE_TTL", 60)
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > _setting("TOKEN_AUTH_CACHE_SIZE", 10000):
+                self._entries.popitem(last=False)
+
+    def evict(self, keys=(), user_id=None):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+            if user_id is not None:
+                for key in [k for k, (_, (user, _)) in self._entries.items() if user.pk == user_id]:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenLRU()
+
+
+def _shared_cache():
+    alias = _setting("TOKEN_AUTH_SHARED_CACHE", None)
+    return caches[alias] if alias else None
+
+
+def _shared_key(key):
+    return f"auth-token:{key}"
+
+
+def evict_tokens(keys=(), user_id=None):
+    """Forget cached credentials for ``keys`` and/or every token of ``user_id``."""
+    keys = list(keys)
+    token_cache.evict(keys, user_id)
+    shared = _shared_cache()
+    if shared is None:
+        return
+    if user_id is not None:
+        keys += Token.objects.filter(user_id=user_id).values_list("key", flat=True)
+    if keys:
+        shared.delete_many([_shared_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            shared = _shared_cache()
+            if shared is not None:
+                cached = shared.get(_shared_key(key))
+            if cached is None:
+                cached = super().authenticate_credentials(key)
+                if shared is not None:
+                    shared.set(_shared_key(key), cached, _setting("TOKEN_AUTH_CACHE_TTL", 60))
+            token_cache.set(key, cached)
+
+        # Each request gets its own user instance, so a view that mutates
+        # request.user cannot leak changes into other requests.
+        user, token = cached
+        return copy.copy(user), token
@@ -0,0 +1,137 @@
+"""
+Cached follow graph.
+
+Each user's following and follower ids are stored in the cache as a
+frozenset of ints, loaded from the M2M table on first use. "Is following"
+checks are then a cache read plus an O(1) set operation, and never touch
+``accounts_customuser_following``. Counts have keys of their own, filled
+whenever a set is loaded or by a COUNT query, so a profile view reads one
+small integer instead of unpickling a large account's whole set.
+
+Entries are invalidated whenever the relationship changes: the
+``m2m_changed`` receiver in accounts/signals.py covers ``following.add()``
+and ``following.remove()``, and code that writes the through table
+directly must call ``invalidate()`` itself. With a per-process cache
+backend other processes only see a change once FOLLOW_GRAPH_TIMEOUT
+expires, so production should point FOLLOW_GRAPH_CACHE at a shared cache.
+"""
+
+import heapq
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+Follow = get_user_model().following.through
+
+FOLLOWING = "following"
+FOLLOWERS = "followers"
+
+
+def _cache():
+    return caches[getattr(settings, "FOLLOW_GRAPH_CACHE", "default")]
+
+
+def _timeout():
+    return getattr(settings, "FOLLOW_GRAPH_TIMEOUT", 300)
+
+
+def _key(kind, user_id):
+    return f"follow-graph:{kind}:{user_id}"
+
+
+def _count_key(kind, user_id):
+    return f"follow-graph:{kind}-count:{user_id}"
+
+
+def _columns(kind):
+    """``(own, other)`` columns of the M2M table for ``kind``."""
+    if kind == FOLLOWING:
+        return "from_customuser_id", "to_customuser_id"
+    return "to_customuser_id", "from_customuser_id"
+
+
+def _load(kind, user_ids):
+    """Read adjacency sets from the M2M table for ``user_ids``."""
+    own, other = _columns(kind)
+    adjacency = {user_id: set() for user_id in user_ids}
+    rows = Follow.objects.filter(**{f"{own}__in": user_ids}).values_list(own, other)
+    for user_id, neighbour_id in rows.iterator(chunk_size=10000):
+        adjacency[user_id].add(neighbour_id)
+    return {user_id: frozenset(ids) for user_id, ids in adjacency.items()}
+
+
+def _get_many(kind, user_ids):
+    user_ids = list(user_ids)
+    keys = {_key(kind, user_id): user_id for user_id in user_ids}
+    cached = _cache().get_many(keys)
+    result = {keys[key]: value for key, value in cached.items()}
+
+    missing = [user_id for user_id in user_ids if user_id not in result]
+    if missing:
+        loaded = _load(kind, missing)
+        entries = {}
+        for user_id, ids in loaded.items():
+            entries[_key(kind, user_id)] = ids
+            entries[_count_key(kind, user_id)] = len(ids)
+        _cache().set_many(entries, _timeout())
+        result.update(loaded)
+    return result
+
+
+def following_ids(user_id):
+    return _get_many(FOLLOWING, [user_id])[user_id]
+
+
+def follower_ids(user_id):
+    return _get_many(FOLLOWERS, [user_id])[user_id]
+
+
+def following_map(user_ids):
+    """``{user_id: frozenset of followed ids}`` with one cache round trip."""
+    return _get_many(FOLLOWING, user_ids)
+
+
+def _count(kind, user_id):
+    count = _cache().get(_count_key(kind, user_id))
+    if count is None:
+        own, _ = _columns(kind)
+        count = Follow.objects.filter(**{own: user_id}).count()
+        _cache().set(_count_key(kind, user_id), count, _timeout())
+    return count
+
+
+def following_count(user_id):
+    return _count(FOLLOWING, user_id)
+
+
+def follower_count(user_id):
+    return _count(FOLLOWERS, user_id)
+
+
+def is_following(user_id, target_id):
+    return target_id in following_ids(user_id)
+
+
+def suggestions(user_id, limit):
+    """Friends of friends ``user_id`` does not follow yet, as ``(id, mutual_count)``.
+
+    Ranked by how many followed accounts also follow the candidate. Works on
+    the cached adjacency sets only: one cache round trip for the neighbours'
+    sets, no joins.
+    """
+    following = following_ids(user_id)
+    mutuals = Counter()
+    for followed in following_map(following).values():
+        mutuals.update(followed - following)
+    mutuals.pop(user_id, None)
+    return heapq.nsmallest(limit, mutuals.items(), key=lambda item: (-item[1], item[0]))
+
+
+def invalidate(follower_ids=(), followed_ids=()):
+    """Drop cached sets after follows from ``follower_ids`` to ``followed_ids`` changed."""
+    _cache().delete_many(
+        [key for user_id in follower_ids for key in (_key(FOLLOWING, user_id), _count_key(FOLLOWING, user_id))]
+        + [key for user_id in followed_ids for key in (_key(FOLLOWERS, user_id), _count_key(FOLLOWERS, user_id))]
+    )
@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from accounts.authentication import CachedTokenAuthentication, token_cache
+from social_media_api.benchmark import format_row, measure, rolled_back
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compare per-request token authentication cost with and without the token cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = User.objects.create(username="bench-token-user", password="!")
+            key = Token.objects.create(user=user).key
+            token_cache.clear()
+
+            for label, backend in [
+                ("TokenAuthentication", TokenAuthentication()),
+                ("CachedTokenAuthentication", CachedTokenAuthentication()),
+            ]:
+                def authenticate():
+                    backend.authenticate_credentials(key)
+
+                result = measure(authenticate, options["iterations"])
+                with CaptureQueriesContext(connection) as queries:
+                    authenticate()
+                self.stdout.write(f"{format_row(label, result)}  queries={len(queries)}")
+        token_cache.clear()
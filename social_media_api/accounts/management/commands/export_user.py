@@ -0,0 +1,25 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.export import export_lines
+
+
+class Command(BaseCommand):
+    help = "Write a user's posts, comments, likes and notifications as newline-delimited JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--output", help="File to write to. Defaults to stdout.")
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(username=options["username"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user named {options['username']!r}.")
+
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                output.writelines(export_lines(user))
+        else:
+            for line in export_lines(user):
+                self.stdout.write(line.decode(), ending="")
@@ -2,6 +2,8 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate, get_user_model
 from rest_framework.authtoken.models import Token
 
+from . import graph
+
 User = get_user_model()
 
 
@@ -43,8 +45,10 @@ class LoginSerializer(serializers.Serializer):
 
 
 class UserSerializer(serializers.ModelSerializer):
-    followers = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
-    following = serializers.PrimaryKeyRelatedField(many=True, read_only=True)
+    # Counts come from the cached follow graph; the member lists are served
+    # paginated by the followers/following endpoints.
+    followers_count = serializers.SerializerMethodField()
+    following_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -54,6 +58,47 @@ class UserSerializer(serializers.ModelSerializer):
             "email",
             "bio",
             "profile_picture",
-            "followers",
-            "following",
+            "followers_count",
+            "following_count",
         ]
+
+    def get_followers_count(self, obj):
+        return graph.follower_count(obj.pk)
+
+    def get_following_count(self, obj):
+        return graph.following_count(obj.pk)
+
+
+class FollowListSerializer(serializers.ModelSerializer):
+    is_following = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ["id", "username", "profile_picture", "is_following"]
+
+    def get_is_following(self, obj):
+        # Whether the requesting user follows this row's user.
+        return obj.pk in self.context["viewer_following"]
+
+
+class FollowSuggestionSerializer(FollowListSerializer):
+    mutual_count = serializers.SerializerMethodField()
+
+    class Meta(FollowListSerializer.Meta):
+        fields = FollowListSerializer.Meta.fields + ["mutual_count"]
+
+    def get_mutual_count(self, obj):
+        # How many of the requesting user's followed accounts follow this user.
+        return self.context["mutual_counts"][obj.pk]
+
+
+class BulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=200,
+    )
+
+    def validate_user_ids(self, value):
+        # Keep first-seen order while dropping duplicates.
+        return list(dict.fromkeys(value))
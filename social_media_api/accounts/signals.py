@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import graph
+from .authentication import evict_tokens
+
+
+@receiver(m2m_changed, sender=graph.Follow)
+def invalidate_follow_graph(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == "pre_clear":
+        # clear() does not provide pk_set; remember who is affected.
+        related = instance.followers if reverse else instance.following
+        instance._follow_graph_cleared = set(related.values_list("pk", flat=True))
+        return
+    if action == "post_clear":
+        pk_set = instance.__dict__.pop("_follow_graph_cleared", set())
+    elif action not in ("post_add", "post_remove"):
+        return
+
+    if reverse:
+        graph.invalidate(follower_ids=pk_set, followed_ids=[instance.pk])
+    else:
+        graph.invalidate(follower_ids=[instance.pk], followed_ids=pk_set)
+
+
+@receiver(post_delete, sender=Token)
+def evict_deleted_token(sender, instance, **kwargs):
+    evict_tokens([instance.key])
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def evict_saved_user_tokens(sender, instance, created, **kwargs):
+    # Covers deactivation as well as any other change to the cached user.
+    if not created:
+        evict_tokens(user_id=instance.pk)
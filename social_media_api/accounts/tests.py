@@ -1,3 +1,290 @@
-from django.test import TestCase
+import json
+import tracemalloc
+from collections import Counter
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from notifications.models import Notification
+from notifications.queue import notification_queue
+from posts.models import Comment, FeedEntry, Like, Post
+from social_media_api.testing import QueryBudgetMixin
+
+from . import graph
+from .authentication import token_cache
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ProfileQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    query_budgets = {"profile": 2, "user-followers": 3}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="member", password="testpass123")
+        self.client.force_authenticate(self.user)
+        for i in range(5):
+            other = User.objects.create_user(username=f"other{i}", password="testpass123")
+            self.user.following.add(other)
+            other.following.add(self.user)
+
+    def test_profile_budget(self):
+        self.assertQueryBudget("profile")
+
+    def test_profile_is_served_from_the_graph_cache(self):
+        self.client.get(reverse("profile"))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("profile"))
+        self.assertEqual(response.data["followers_count"], 5)
+        self.assertEqual(response.data["following_count"], 5)
+        self.assertNotIn("followers", response.data)
+
+    def test_followers_list_budget(self):
+        response = self.assertQueryBudget("user-followers", self.user.id)
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertTrue(all(row["is_following"] for row in response.data["results"]))
+
+    def test_follow_lists_of_unknown_user_are_404(self):
+        for name in ("user-followers", "user-following"):
+            response = self.client.get(reverse(name, args=[999999]))
+            self.assertEqual(response.status_code, 404)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATION_QUEUE_ASYNC=False)
+class FollowGraphTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="member", password="testpass123")
+        self.target = User.objects.create_user(username="target", password="testpass123")
+        self.client.force_authenticate(self.user)
+
+    def test_follow_and_unfollow_invalidate_cached_sets(self):
+        self.assertFalse(graph.is_following(self.user.pk, self.target.pk))
+        self.assertEqual(graph.follower_count(self.target.pk), 0)
+
+        self.client.post(reverse("follow-user", args=[self.target.id]))
+        self.assertTrue(graph.is_following(self.user.pk, self.target.pk))
+        self.assertEqual(graph.follower_ids(self.target.pk), {self.user.pk})
+
+        self.client.post(reverse("unfollow-user", args=[self.target.id]))
+        self.assertFalse(graph.is_following(self.user.pk, self.target.pk))
+        self.assertEqual(graph.follower_count(self.target.pk), 0)
+
+    def test_membership_checks_do_not_query_after_first_load(self):
+        self.user.following.add(self.target)
+        graph.following_ids(self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(graph.is_following(self.user.pk, self.target.pk))
+            self.assertEqual(graph.following_count(self.user.pk), 1)
+
+    def test_counts_do_not_load_the_sets(self):
+        self.user.following.add(self.target)
+
+        self.assertEqual(graph.follower_count(self.target.pk), 1)
+        self.assertIsNone(cache.get(graph._key(graph.FOLLOWERS, self.target.pk)))
+        with self.assertNumQueries(0):
+            self.assertEqual(graph.follower_count(self.target.pk), 1)
+
+    def test_reverse_clear_invalidates_followers(self):
+        self.user.following.add(self.target)
+        self.assertEqual(graph.following_count(self.user.pk), 1)
+
+        self.target.followers.clear()
+
+        self.assertEqual(graph.following_count(self.user.pk), 0)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATION_QUEUE_ASYNC=False)
+class BulkFollowTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        notification_queue.clear()
+        self.user = User.objects.create_user(username="member", password="testpass123")
+        self.others = [
+            User.objects.create_user(username=f"other{i}", password="testpass123") for i in range(5)
+        ]
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_follow_writes_all_rows(self):
+        self.user.following.add(self.others[0])
+        post = Post.objects.create(author=self.others[1], title="Hi", content="x", fanned_out=True)
+        ids = [other.id for other in self.others]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("bulk-follow"), {"user_ids": ids}, format="json")
+        notification_queue.drain()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["followed"], ids[1:])
+        self.assertEqual(graph.following_ids(self.user.pk), set(ids))
+        self.assertEqual(graph.follower_ids(self.others[1].pk), {self.user.pk})
+        self.assertTrue(FeedEntry.objects.filter(user=self.user, post=post).exists())
+        self.assertEqual(Notification.objects.filter(actor=self.user).count(), 4)
+
+    def test_bulk_follow_rejects_unknown_ids(self):
+        response = self.client.post(
+            reverse("bulk-follow"), {"user_ids": [self.others[0].id, 999999]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.data["missing"], [999999])
+        self.assertFalse(self.user.following.exists())
+
+    def test_bulk_unfollow(self):
+        self.user.following.add(*self.others)
+
+        response = self.client.post(
+            reverse("bulk-unfollow"),
+            {"user_ids": [self.others[0].id, self.others[1].id, 999999]},
+            format="json",
+        )
+
+        self.assertEqual(response.data["unfollowed"], [self.others[0].id, self.others[1].id])
+        self.assertEqual(graph.following_count(self.user.pk), 3)
+
+    def test_suggestions_rank_friends_of_friends(self):
+        a, b, c, d, e = self.others
+        self.user.following.add(a, b)
+        a.following.add(c, d, self.user)
+        b.following.add(c, a)
+        e.following.add(d)
+
+        response = self.client.get(reverse("follow-suggestions"))
+
+        self.assertEqual(
+            [(row["id"], row["mutual_count"]) for row in response.data["results"]],
+            [(c.id, 2), (d.id, 1)],
+        )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CachedTokenAuthenticationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        token_cache.clear()
+        self.user = User.objects.create_user(username="member", password="testpass123")
+        self.token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_repeat_requests_skip_the_token_query(self):
+        self.assertEqual(self.client.get(reverse("profile")).status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("profile"))
+        self.assertEqual(response.data["username"], "member")
+
+    def test_deleted_token_is_rejected(self):
+        self.client.get(reverse("profile"))
+
+        self.token.delete()
+
+        self.assertEqual(self.client.get(reverse("profile")).status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(reverse("profile"))
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(reverse("profile")).status_code, 401)
+
+    @override_settings(TOKEN_AUTH_SHARED_CACHE="default")
+    def test_shared_tier_serves_other_processes(self):
+        self.client.get(reverse("profile"))
+        # A fresh process has an empty local LRU but the same shared cache.
+        token_cache.clear()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse("profile")).status_code, 200)
+
+        self.token.delete()
+        token_cache.clear()
+        self.assertEqual(self.client.get(reverse("profile")).status_code, 401)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, EXPORT_CHUNK_SIZE=100)
+class ExportTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="testpass123")
+        self.other = User.objects.create_user(username="other", password="testpass123")
+        self.client.force_authenticate(self.user)
+
+    def add_rows(self, count):
+        posts = Post.objects.bulk_create([
+            Post(author=self.user, title=f"Post {i}", content="x" * 200) for i in range(count)
+        ])
+        Comment.objects.bulk_create([Comment(post=post, author=self.user, content="Hi") for post in posts])
+        Like.objects.bulk_create([Like(user=self.user, post=post) for post in posts])
+        Notification.objects.bulk_create([
+            Notification(recipient=self.user, actor=self.other, verb="followed you") for _ in range(count)
+        ])
+
+    def export_peak(self):
+        """Stream the export and return (line count, peak traced bytes)."""
+        response = self.client.get(reverse("export"))
+        lines = 0
+        tracemalloc.start()
+        try:
+            for chunk in response.streaming_content:
+                lines += chunk.count(b"\n")
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return lines, peak
+
+    def test_export_streams_every_row(self):
+        self.add_rows(3)
+        Post.objects.create(author=self.other, title="Not mine", content="x")
+
+        response = self.client.get(reverse("export"))
+
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        records = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(records[0]["username"], "member")
+        self.assertEqual(
+            Counter(record["type"] for record in records),
+            {"user": 1, "post": 3, "comment": 3, "like": 3, "notification": 3},
+        )
+        self.assertTrue(all(r["author"] == "member" for r in records if r["type"] == "post"))
+
+    def test_peak_memory_does_not_grow_with_row_count(self):
+        self.add_rows(200)
+        lines, small_peak = self.export_peak()
+        self.assertEqual(lines, 801)
+
+        self.add_rows(1800)
+        lines, large_peak = self.export_peak()
+        self.assertEqual(lines, 8001)
+
+        # Ten times the rows must not mean anywhere near ten times the memory.
+        self.assertLess(large_peak, small_peak * 2)
+
+    async def test_asgi_export_is_an_async_stream(self):
+        await sync_to_async(self.add_rows)(2)
+        token = await Token.objects.acreate(user=self.user)
+
+        response = await AsyncClient().get(
+            reverse("export"), headers={"Authorization": f"Token {token.key}"}
+        )
+
+        self.assertTrue(response.is_async)
+        lines = [line async for line in response.streaming_content]
+        self.assertEqual(len(lines), 9)
+
+    def test_export_user_command(self):
+        self.add_rows(2)
+        out = StringIO()
+
+        call_command("export_user", "member", stdout=out)
+
+        self.assertEqual(len(out.getvalue().splitlines()), 9)
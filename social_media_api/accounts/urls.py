@@ -3,6 +3,12 @@ from .views import (
     RegisterView,
     LoginView,
     ProfileView,
+    ExportView,
+    FollowersListView,
+    FollowingListView,
+    BulkFollowView,
+    BulkUnfollowView,
+    FollowSuggestionsView,
     follow_user,
     unfollow_user
 )
@@ -11,8 +17,14 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('login/', LoginView.as_view(), name='login'),
     path('profile/', ProfileView.as_view(), name='profile'),
+    path('export/', ExportView.as_view(), name='export'),
+    path('<int:user_id>/followers/', FollowersListView.as_view(), name='user-followers'),
+    path('<int:user_id>/following/', FollowingListView.as_view(), name='user-following'),
 
     # Follow system
     path('follow/<int:user_id>/', follow_user, name='follow-user'),
     path('unfollow/<int:user_id>/', unfollow_user, name='unfollow-user'),
+    path('follow/bulk/', BulkFollowView.as_view(), name='bulk-follow'),
+    path('unfollow/bulk/', BulkUnfollowView.as_view(), name='bulk-unfollow'),
+    path('suggestions/', FollowSuggestionsView.as_view(), name='follow-suggestions'),
 ]
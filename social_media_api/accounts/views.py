@@ -1,10 +1,27 @@
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
 
-from .serializers import RegisterSerializer, LoginSerializer, UserSerializer
+from notifications.utils import create_notification_for_follow
+from posts.feed import backfill_feed, prune_feed
+
+from . import graph
+from .export import aexport_lines, export_lines
+from .serializers import (
+    BulkFollowSerializer,
+    FollowListSerializer,
+    FollowSuggestionSerializer,
+    LoginSerializer,
+    RegisterSerializer,
+    UserSerializer,
+)
 
 CustomUser = get_user_model()
 
@@ -48,6 +65,50 @@ class ProfileView(generics.RetrieveUpdateAPIView):
         return self.request.user
 
 
+class ExportView(generics.GenericAPIView):
+    """Stream the caller's data as newline-delimited JSON."""
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if isinstance(request._request, ASGIRequest):
+            lines = aexport_lines(request.user)
+        else:
+            lines = export_lines(request.user)
+        response = StreamingHttpResponse(lines, content_type="application/x-ndjson")
+        response["Content-Disposition"] = f'attachment; filename="{request.user.username}-export.ndjson"'
+        return response
+
+
+class FollowListPagination(CursorPagination):
+    ordering = "id"
+
+
+class FollowersListView(generics.ListAPIView):
+    """Paginated followers of a user, each flagged with whether the caller follows them."""
+
+    serializer_class = FollowListSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = FollowListPagination
+
+    def get_queryset(self):
+        return CustomUser.objects.filter(following__id=self.target_user_id())
+
+    def target_user_id(self):
+        """The listed user's id; 404 rather than an empty page for an unknown user."""
+        return get_object_or_404(CustomUser.objects.only("pk"), pk=self.kwargs["user_id"]).pk
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["viewer_following"] = graph.following_ids(self.request.user.pk)
+        return context
+
+
+class FollowingListView(FollowersListView):
+    def get_queryset(self):
+        return CustomUser.objects.filter(followers__id=self.target_user_id())
+
+
 # ------------------------------
 # Follow / Unfollow (Class-Based)
 # ------------------------------
@@ -66,7 +127,11 @@ class FollowUserView(generics.GenericAPIView):
         if target_user == request.user:
             return Response({"detail": "You cannot follow yourself."}, status=400)
 
+        already_following = graph.is_following(request.user.pk, target_user.pk)
         request.user.following.add(target_user)
+        backfill_feed(request.user, [target_user.pk])
+        if not already_following:
+            create_notification_for_follow(request.user, target_user)
         return Response({"detail": f"You are now following {target_user.username}."})
 
 
@@ -82,9 +147,91 @@ class UnfollowUserView(generics.GenericAPIView):
             return Response({"detail": "User not found."}, status=404)
 
         request.user.following.remove(target_user)
+        prune_feed(request.user, [target_user.pk])
         return Response({"detail": f"You have unfollowed {target_user.username}."})
 
 
+# ------------------------------
+# Bulk Follow / Unfollow
+# ------------------------------
+
+class BulkFollowView(generics.GenericAPIView):
+    """Follow up to 200 users at once, e.g. from an onboarding screen."""
+
+    serializer_class = BulkFollowSerializer
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user_ids = serializer.validated_data["user_ids"]
+
+        if request.user.pk in user_ids:
+            return Response({"detail": "You cannot follow yourself."}, status=400)
+        found = set(CustomUser.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+        missing = [pk for pk in user_ids if pk not in found]
+        if missing:
+            return Response({"detail": "User not found.", "missing": missing}, status=404)
+
+        already_following = graph.following_ids(request.user.pk)
+        new_ids = [pk for pk in user_ids if pk not in already_following]
+        with transaction.atomic():
+            # Writing the through table directly skips m2m_changed, so the
+            # graph cache is invalidated by hand below.
+            graph.Follow.objects.bulk_create(
+                [graph.Follow(from_customuser_id=request.user.pk, to_customuser_id=pk) for pk in new_ids],
+                ignore_conflicts=True,
+            )
+            backfill_feed(request.user, new_ids)
+            for pk in new_ids:
+                create_notification_for_follow(request.user, CustomUser(pk=pk))
+        graph.invalidate(follower_ids=[request.user.pk], followed_ids=new_ids)
+        return Response({"followed": new_ids})
+
+
+class BulkUnfollowView(BulkFollowView):
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        following = graph.following_ids(request.user.pk)
+        removed = [pk for pk in serializer.validated_data["user_ids"] if pk in following]
+        with transaction.atomic():
+            graph.Follow.objects.filter(
+                from_customuser_id=request.user.pk, to_customuser_id__in=removed
+            ).delete()
+            prune_feed(request.user, removed)
+        graph.invalidate(follower_ids=[request.user.pk], followed_ids=removed)
+        return Response({"unfollowed": removed})
+
+
+class FollowSuggestionsView(generics.GenericAPIView):
+    """People followed by the accounts the caller follows, most mutual first."""
+
+    serializer_class = FollowSuggestionSerializer
+    permission_classes = [IsAuthenticated]
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), self.max_limit)
+        except ValueError:
+            limit = 20
+
+        ranked = graph.suggestions(request.user.pk, max(limit, 1))
+        users = CustomUser.objects.in_bulk([pk for pk, _ in ranked])
+        serializer = self.get_serializer(
+            [users[pk] for pk, _ in ranked if pk in users],
+            many=True,
+            context={
+                **self.get_serializer_context(),
+                "viewer_following": frozenset(),
+                "mutual_counts": dict(ranked),
+            },
+        )
+        return Response({"results": serializer.data})
+
+
 # ------------------------------
 # Follow / Unfollow (Function Wrappers)
 # REQUIRED for urls.py imports
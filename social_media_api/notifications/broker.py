@@ -0,0 +1,108 @@
+"""
+Pub/sub brokers that push notifications to connected stream clients.
+
+The queue worker publishes every notification it writes; the SSE view in
+notifications/views.py subscribes once per open connection. The broker
+class is chosen with the NOTIFICATION_BROKER setting so a multi-node
+deployment can swap in a networked implementation (Redis pub/sub, for
+example) without touching either side.
+"""
+
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class BaseBroker:
+    def publish(self, user_id, message):
+        """Deliver ``message`` (a JSON-serializable dict) to ``user_id``'s subscribers.
+
+        Must be safe to call from any thread.
+        """
+        raise NotImplementedError
+
+    def subscribe(self, user_id):
+        """Return a Subscription bound to the running event loop."""
+        raise NotImplementedError
+
+    def has_subscribers(self, user_ids):
+        """Return True when any of ``user_ids`` has an open subscription.
+
+        Lets publishers skip building messages nobody will read.
+        """
+        return True
+
+
+class Subscription:
+    def __init__(self, broker, user_id, max_pending):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def deliver(self, message):
+        # Runs on the subscriber's event loop. A client that stops reading
+        # loses messages rather than growing the queue without bound.
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+
+    async def get(self, timeout=None):
+        """Next message, or None if ``timeout`` seconds pass without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker(BaseBroker):
+    """Single-process broker. Suitable for one ASGI worker and for tests."""
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's loop has shut down.
+                self.unsubscribe(subscription)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(self, user_id, self.max_pending)
+        with self._lock:
+            self._subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def has_subscribers(self, user_ids):
+        with self._lock:
+            return any(user_id in self._subscriptions for user_id in user_ids)
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    path = getattr(settings, "NOTIFICATION_BROKER", "notifications.broker.InMemoryBroker")
+    return import_string(path)()
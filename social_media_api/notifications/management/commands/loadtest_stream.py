@@ -0,0 +1,92 @@
+import asyncio
+import resource
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many idle connections to the notification stream of a running "
+        "ASGI server and report how many it keeps open."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--token", required=True, help="API token used by every connection.")
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8000)
+        parser.add_argument("--path", default="/api/notifications/stream/")
+        parser.add_argument("--connections", type=int, default=1000)
+        parser.add_argument("--hold", type=float, default=30.0, help="Seconds to hold connections open.")
+        parser.add_argument("--server-pid", type=int, help="Report this process's RSS while connections are held.")
+
+    def handle(self, *args, **options):
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if options["connections"] + 64 > soft:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, options["connections"] + 64), hard))
+        asyncio.run(self.run(options))
+
+    async def run(self, options):
+        request = (
+            f"GET {options['path']} HTTP/1.1\r\n"
+            f"Host: {options['host']}\r\n"
+            f"Authorization: Token {options['token']}\r\n"
+            "Accept: text/event-stream\r\n\r\n"
+        ).encode()
+
+        rss_before = self.rss(options["server_pid"])
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *(self.connect(options["host"], options["port"], request) for _ in range(options["connections"])),
+            return_exceptions=True,
+        )
+        streams = [result for result in results if isinstance(result, tuple)]
+        failures = len(results) - len(streams)
+        elapsed = time.perf_counter() - started
+        if not streams:
+            raise CommandError(f"No connection succeeded; first error: {results[0]!r}")
+
+        self.stdout.write(f"Connected {len(streams)}/{len(results)} streams in {elapsed:.2f}s ({failures} failed)")
+        await asyncio.sleep(options["hold"])
+
+        alive = sum(1 for reader, writer in streams if not reader.at_eof() and not writer.is_closing())
+        self.stdout.write(f"Still open after {options['hold']:.0f}s: {alive}")
+        rss_after = self.rss(options["server_pid"])
+        if rss_before is not None and rss_after is not None:
+            per_connection = (rss_after - rss_before) / max(alive, 1)
+            self.stdout.write(
+                f"Server RSS {rss_before / 1024:.1f} MiB -> {rss_after / 1024:.1f} MiB "
+                f"(~{per_connection:.1f} KiB per connection)"
+            )
+
+        for _, writer in streams:
+            writer.close()
+
+    async def connect(self, host, port, request):
+        reader, writer = await asyncio.open_connection(host, port)
+        writer.write(request)
+        await writer.drain()
+        status_line = await reader.readline()
+        if b" 200 " not in status_line:
+            writer.close()
+            raise CommandError(f"Unexpected response: {status_line!r}")
+        # Skip headers; the first event ("retry:") proves the stream is live.
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        await reader.readline()
+        asyncio.get_running_loop().create_task(self.discard(reader))
+        return reader, writer
+
+    async def discard(self, reader):
+        # Keep reading keep-alives so the server never blocks on a full socket.
+        while await reader.read(4096):
+            pass
+
+    def rss(self, pid):
+        if pid is None:
+            return None
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+        return None
@@ -1,4 +1,8 @@
+from collections import defaultdict
+
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
@@ -26,12 +30,97 @@ class Notification(models.Model):
     object_id = models.PositiveIntegerField(null=True, blank=True)
     target = GenericForeignKey("content_type", "object_id")
 
+    # How many distinct actors were coalesced into this notification; the
+    # actor field holds the most recent one.
+    actor_count = models.PositiveIntegerField(default=1)
+
     read = models.BooleanField(default=False)
 
     timestamp = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(
+                fields=["recipient", "-timestamp", "-id"],
+                name="notif_recipient_ts_id_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.actor} {self.verb} -> {self.recipient}"
+
+    @property
+    def summary(self):
+        return self.format_summary(self.actor.username, self.actor_count, self.verb)
+
+    @staticmethod
+    def format_summary(actor_username, actor_count, verb):
+        if actor_count > 1:
+            return f"{actor_count} people {verb}"
+        return f"{actor_username} {verb}"
+
+
+class NotificationActor(models.Model):
+    """The distinct actors coalesced into a notification, so an actor who
+    shows up again in a later batch is not counted twice."""
+
+    notification = models.ForeignKey(
+        Notification,
+        on_delete=models.CASCADE,
+        related_name="actor_links",
+    )
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["notification", "actor"],
+                name="notif_actor_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.actor_id} -> notification {self.notification_id}"
+
+
+class UnreadCounter(models.Model):
+    """Number of unread notifications per user, so badge polling never has
+    to count the notification table."""
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="unread_counter",
+    )
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.count} unread"
+
+    @classmethod
+    def get_count(cls, user):
+        counter = cls.objects.filter(user=user).values_list("count", flat=True).first()
+        if counter is None:
+            counter = Notification.objects.filter(recipient=user, read=False).count()
+            cls.objects.get_or_create(user=user, defaults={"count": counter})
+        return counter
+
+    @classmethod
+    def add(cls, deltas):
+        """Apply ``{user_id: delta}`` changes, one UPDATE per distinct delta."""
+        deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        cls.objects.bulk_create([cls(user_id=user_id) for user_id in deltas], ignore_conflicts=True)
+
+        users_by_delta = defaultdict(list)
+        for user_id, delta in deltas.items():
+            users_by_delta[delta].append(user_id)
+        for delta, user_ids in users_by_delta.items():
+            cls.objects.filter(user_id__in=user_ids).update(count=Greatest(F("count") + delta, 0))
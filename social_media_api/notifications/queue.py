@@ -0,0 +1,219 @@
+"""
+Batched, coalesced notification delivery.
+
+Views never insert Notification rows themselves. They enqueue an event once
+their transaction commits, and a worker thread drains the queue in batches:
+
+* events for the same recipient, verb and target are coalesced into one
+  row whose ``actor_count`` says how many people were involved, so a viral
+  post produces one "N people liked your post" notification. Counted actors
+  are recorded in NotificationActor, so someone who likes, unlikes and
+  likes again in a later batch is not counted twice;
+* an unread row that already exists for that key is updated in place with
+  ``bulk_update`` instead of inserting another one;
+* everything else is written with a single ``bulk_create`` per batch.
+
+Written rows are then published to the notification broker for clients
+holding an open stream.
+
+With ``NOTIFICATION_QUEUE_ASYNC = False`` no thread is started and events
+wait until ``notification_queue.drain()`` is called (used by the tests).
+"""
+
+import atexit
+import logging
+import threading
+from collections import OrderedDict, defaultdict, deque, namedtuple
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .broker import get_broker
+from .models import Notification, NotificationActor, UnreadCounter
+from .serializers import NotificationSerializer
+
+logger = logging.getLogger(__name__)
+
+NotificationEvent = namedtuple(
+    "NotificationEvent",
+    ["recipient_id", "actor_id", "verb", "content_type_id", "object_id"],
+)
+
+
+class NotificationQueue:
+    def __init__(self):
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    @property
+    def batch_size(self):
+        return getattr(settings, "NOTIFICATION_BATCH_SIZE", 500)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, "NOTIFICATION_FLUSH_INTERVAL", 1.0)
+
+    def put(self, event):
+        self._events.append(event)
+        if not getattr(settings, "NOTIFICATION_QUEUE_ASYNC", True):
+            return
+        self._ensure_worker()
+        if len(self._events) >= self.batch_size:
+            self._wakeup.set()
+
+    def put_on_commit(self, event):
+        """Enqueue ``event`` only if and when the current transaction commits."""
+        transaction.on_commit(lambda: self.put(event))
+
+    def clear(self):
+        self._events.clear()
+
+    def __len__(self):
+        return len(self._events)
+
+    def drain(self):
+        """Write every pending event. Returns the number of rows touched."""
+        touched = 0
+        with self._lock:
+            while self._events:
+                batch = []
+                while self._events and len(batch) < self.batch_size:
+                    batch.append(self._events.popleft())
+                touched += self._write(batch)
+        return touched
+
+    # ----------------------------
+    # Writing
+    # ----------------------------
+
+    def _write(self, events):
+        groups = OrderedDict()
+        for event in events:
+            key = (event.recipient_id, event.verb, event.content_type_id, event.object_id)
+            # dict keys keep each actor once, in arrival order.
+            groups.setdefault(key, {})[event.actor_id] = None
+
+        now = timezone.now()
+        existing = self._unread_rows(groups)
+        counted = self._counted_actors(existing.values(), {e.actor_id for e in events})
+        updated, created, links = [], [], []
+        for key, actors in groups.items():
+            actor_ids = list(actors)
+            row = existing.get(key)
+            if row is not None:
+                new_actor_ids = [a for a in actor_ids if (row.pk, a) not in counted]
+                row.actor_id = actor_ids[-1]
+                row.actor_count += len(new_actor_ids)
+                row.timestamp = now
+                updated.append(row)
+                links += [NotificationActor(notification=row, actor_id=a) for a in new_actor_ids]
+            else:
+                recipient_id, verb, content_type_id, object_id = key
+                row = Notification(
+                    recipient_id=recipient_id,
+                    actor_id=actor_ids[-1],
+                    verb=verb,
+                    content_type_id=content_type_id,
+                    object_id=object_id,
+                    actor_count=len(actor_ids),
+                )
+                created.append(row)
+                links += [NotificationActor(notification=row, actor_id=a) for a in actor_ids]
+
+        with transaction.atomic():
+            if updated:
+                Notification.objects.bulk_update(updated, ["actor", "actor_count", "timestamp"])
+            if created:
+                Notification.objects.bulk_create(created)
+                new_unread = defaultdict(int)
+                for row in created:
+                    new_unread[row.recipient_id] += 1
+                UnreadCounter.add(new_unread)
+            if links:
+                NotificationActor.objects.bulk_create(links, ignore_conflicts=True)
+            transaction.on_commit(lambda: self._publish(updated + created))
+        return len(updated) + len(created)
+
+    def _publish(self, rows):
+        """Push written rows to any recipient with an open stream."""
+        broker = get_broker()
+        if not broker.has_subscribers({row.recipient_id for row in rows}):
+            return
+        notifications = Notification.objects.filter(
+            pk__in=[row.pk for row in rows]
+        ).select_related("actor")
+        for notification in notifications:
+            broker.publish(notification.recipient_id, NotificationSerializer(notification).data)
+
+    def _unread_rows(self, groups):
+        """Latest unread notification for each coalescing key, in one query."""
+        object_ids = {key[3] for key in groups if key[3] is not None}
+        candidates = Notification.objects.filter(
+            Q(object_id__in=object_ids) | Q(object_id__isnull=True),
+            read=False,
+            recipient_id__in={key[0] for key in groups},
+            verb__in={key[1] for key in groups},
+        ).order_by("timestamp", "id")
+
+        rows = {}
+        for row in candidates:
+            key = (row.recipient_id, row.verb, row.content_type_id, row.object_id)
+            if key in groups:
+                rows[key] = row
+        return rows
+
+    def _counted_actors(self, rows, actor_ids):
+        """Which of ``actor_ids`` are already counted on ``rows``, as
+        ``(notification id, actor id)`` pairs, in one query."""
+        rows = list(rows)
+        if not rows:
+            return set()
+        return set(
+            NotificationActor.objects.filter(notification__in=rows, actor_id__in=actor_ids)
+            .values_list("notification_id", "actor_id")
+        )
+
+    # ----------------------------
+    # Worker thread
+    # ----------------------------
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="notification-queue", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if not self._events:
+                continue
+            close_old_connections()
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Failed to write notification batch")
+            finally:
+                close_old_connections()
+
+
+notification_queue = NotificationQueue()
+
+
+@atexit.register
+def _drain_on_exit():
+    if notification_queue._worker is not None and len(notification_queue):
+        try:
+            notification_queue.drain()
+        except Exception:
+            logger.exception("Failed to write pending notifications at exit")
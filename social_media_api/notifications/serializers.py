@@ -1,9 +1,12 @@
 from rest_framework import serializers
 from .models import Notification
+from social_media_api.sparse import SparseFieldsetSerializerMixin
 
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     actor_username = serializers.ReadOnlyField(source="actor.username")
+    created_at = serializers.DateTimeField(source="timestamp", read_only=True)
+    summary = serializers.ReadOnlyField()
 
     class Meta:
         model = Notification
@@ -12,15 +15,63 @@ class NotificationSerializer(serializers.ModelSerializer):
             "actor",
             "actor_username",
             "verb",
+            "actor_count",
+            "summary",
             "object_id",
             "read",
             "created_at",
         ]
+        field_sources = {"summary": ["actor__username", "actor_count", "verb"]}
+        fast_fields = {
+            "summary": lambda row: Notification.format_summary(
+                row["actor__username"], row["actor_count"], row["verb"]
+            ),
+        }
         read_only_fields = [
             "id",
             "actor",
             "actor_username",
             "verb",
+            "actor_count",
             "object_id",
             "created_at",
         ]
+
+
+class BulkMarkReadSerializer(serializers.Serializer):
+    """Selects which of the caller's notifications to mark read.
+
+    Exactly one of ``all``, ``ids``, ``up_to_id`` or ``before`` must be given.
+    """
+
+    all = serializers.BooleanField(required=False)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        allow_empty=False,
+        max_length=1000,
+    )
+    up_to_id = serializers.IntegerField(required=False, min_value=1)
+    before = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        chosen = [name for name in ("all", "ids", "up_to_id", "before") if attrs.get(name)]
+        if len(chosen) != 1:
+            raise serializers.ValidationError(
+                "Provide exactly one of: all, ids, up_to_id, before."
+            )
+        return attrs
+
+    def filter_queryset(self, queryset):
+        data = self.validated_data
+        if "ids" in data:
+            return queryset.filter(id__in=data["ids"])
+        if "up_to_id" in data:
+            return queryset.filter(id__lte=data["up_to_id"])
+        if "before" in data:
+            return queryset.filter(timestamp__lte=data["before"])
+        return queryset
+
+
+class PruneSerializer(serializers.Serializer):
+    older_than_days = serializers.IntegerField(min_value=0, default=30)
@@ -1,3 +1,314 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from posts.models import Post
+from social_media_api.testing import QueryBudgetMixin
+
+from .broker import InMemoryBroker, get_broker
+from .models import Notification, UnreadCounter
+from .queue import NotificationEvent, notification_queue
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class NotificationListTests(QueryBudgetMixin, APITestCase):
+    query_budgets = {"notifications": 1}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="recipient", password="testpass123")
+        self.actor = User.objects.create_user(username="actor", password="testpass123")
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_keyset_paginated_newest_first(self):
+        notifications = [
+            Notification.objects.create(recipient=self.user, actor=self.actor, verb=f"event {i}")
+            for i in range(15)
+        ]
+
+        first = self.client.get(reverse("notifications"))
+        second = self.client.get(first.data["next"])
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        ids = [item["id"] for item in first.data["results"] + second.data["results"]]
+        self.assertEqual(ids, [n.id for n in reversed(notifications)])
+        self.assertIsNone(second.data["next"])
+        self.assertIn("created_at", first.data["results"][0])
+
+    def test_list_budget(self):
+        for i in range(5):
+            actor = User.objects.create_user(username=f"actor{i}", password="testpass123")
+            Notification.objects.create(recipient=self.user, actor=actor, verb="followed you")
+
+        self.assertQueryBudget("notifications")
+
+    def test_sparse_fields_keep_summary_in_one_query(self):
+        Notification.objects.create(
+            recipient=self.user, actor=self.actor, verb="liked your post", actor_count=3
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("notifications"), {"fields": "id,summary"})
+
+        self.assertEqual(response.data["results"][0], {
+            "id": response.data["results"][0]["id"],
+            "summary": "3 people liked your post",
+        })
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATION_QUEUE_ASYNC=False)
+class NotificationQueueTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        notification_queue.clear()
+        self.author = User.objects.create_user(username="author", password="testpass123")
+        self.post = Post.objects.create(author=self.author, title="Hello", content="x")
+        self.fans = [
+            User.objects.create_user(username=f"fan{i}", password="testpass123")
+            for i in range(3)
+        ]
+
+    def like_as(self, user):
+        self.client.force_authenticate(user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("post-like", args=[self.post.id]))
+
+    def test_likes_are_not_written_on_the_request_path(self):
+        self.like_as(self.fans[0])
+
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(len(notification_queue), 1)
+
+    def test_repeated_likes_coalesce_into_one_row(self):
+        for fan in self.fans:
+            self.like_as(fan)
+
+        notification_queue.drain()
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.recipient, self.author)
+        self.assertEqual(notification.actor, self.fans[-1])
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.summary, "3 people liked your post")
+
+    def test_later_batches_update_the_unread_row(self):
+        self.like_as(self.fans[0])
+        notification_queue.drain()
+        self.like_as(self.fans[1])
+        notification_queue.drain()
+
+        self.assertEqual(Notification.objects.get().actor_count, 2)
+
+        Notification.objects.update(read=True)
+        self.like_as(self.fans[2])
+        notification_queue.drain()
+        self.assertEqual(Notification.objects.filter(read=False).get().actor_count, 1)
+
+    def test_returning_actor_is_counted_once_across_batches(self):
+        self.like_as(self.fans[0])
+        notification_queue.drain()
+        self.client.post(reverse("post-unlike", args=[self.post.id]))
+        self.like_as(self.fans[1])
+        self.like_as(self.fans[0])
+        notification_queue.drain()
+
+        notification = Notification.objects.get()
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(notification.actor, self.fans[0])
+
+    def test_batch_write_cost_is_independent_of_batch_size(self):
+        recipients = User.objects.bulk_create([
+            User(username=f"recipient{i}", password="!") for i in range(50)
+        ])
+        for recipient in recipients:
+            notification_queue.put(NotificationEvent(recipient.id, self.author.id, "started following you", None, None))
+
+        with CaptureQueriesContext(connection) as queries:
+            notification_queue.drain()
+
+        # lookup, savepoint, insert, counter upsert + update, actor links, release
+        self.assertLessEqual(len(queries), 7)
+        self.assertEqual(Notification.objects.count(), 50)
+
+    def test_follow_and_comment_notify(self):
+        self.client.force_authenticate(self.fans[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("follow-user", args=[self.author.id]))
+            self.client.post(reverse("comment-list"), {"post": self.post.id, "content": "hi"}, format="json")
+
+        notification_queue.drain()
+
+        self.assertEqual(
+            sorted(Notification.objects.values_list("verb", flat=True)),
+            ["commented on your post", "started following you"],
+        )
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATION_QUEUE_ASYNC=False)
+class UnreadCountTests(APITestCase):
+    def setUp(self):
+        notification_queue.clear()
+        self.user = User.objects.create_user(username="recipient", password="testpass123")
+        self.actor = User.objects.create_user(username="actor", password="testpass123")
+        self.client.force_authenticate(self.user)
+
+    def notify(self, verb):
+        notification_queue.put(NotificationEvent(self.user.id, self.actor.id, verb, None, None))
+        notification_queue.drain()
+
+    def test_counter_follows_new_and_read_notifications(self):
+        self.notify("started following you")
+        self.notify("mentioned you")
+        self.assertEqual(UnreadCounter.get_count(self.user), 2)
+
+        notification = Notification.objects.filter(recipient=self.user).first()
+        self.client.patch(reverse("notification-read", args=[notification.id]), {}, format="json")
+        self.client.patch(reverse("notification-read", args=[notification.id]), {}, format="json")
+
+        self.assertEqual(UnreadCounter.get_count(self.user), 1)
+
+    def test_unchanged_count_answers_304(self):
+        self.notify("started following you")
+        url = reverse("notification-unread-count")
+
+        response = self.client.get(url)
+        self.assertEqual(response.data, {"unread_count": 1})
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, status.HTTP_304_NOT_MODIFIED)
+        listed = self.client.get(url, HTTP_IF_NONE_MATCH=f'"other", W/{response["ETag"]}')
+        self.assertEqual(listed.status_code, status.HTTP_304_NOT_MODIFIED)
+        # Only whole tags match, not a tag that merely contains this one.
+        longer = response["ETag"][:-1] + '0"'
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=longer).status_code, status.HTTP_200_OK)
+
+        self.notify("mentioned you")
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data, {"unread_count": 2})
+
+    def test_missing_counter_is_rebuilt_from_notifications(self):
+        Notification.objects.create(recipient=self.user, actor=self.actor, verb="x")
+
+        self.assertEqual(UnreadCounter.get_count(self.user), 1)
+        self.assertTrue(UnreadCounter.objects.filter(user=self.user, count=1).exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BulkNotificationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="recipient", password="testpass123")
+        self.other = User.objects.create_user(username="other", password="testpass123")
+        self.client.force_authenticate(self.user)
+        self.notifications = Notification.objects.bulk_create([
+            Notification(recipient=self.user, actor=self.other, verb=f"event {i}")
+            for i in range(6)
+        ])
+        self.foreign = Notification.objects.create(recipient=self.other, actor=self.user, verb="x")
+        UnreadCounter.objects.create(user=self.user, count=6)
+
+    def mark_read(self, payload):
+        return self.client.post(reverse("notification-mark-read"), payload, format="json")
+
+    def test_mark_all_read_in_one_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.mark_read({"all": True})
+
+        self.assertEqual(response.data, {"updated": 6})
+        updates = [q for q in queries.captured_queries if q["sql"].startswith('UPDATE "notifications_notification"')]
+        self.assertEqual(len(updates), 1)
+        self.assertFalse(Notification.objects.get(pk=self.foreign.pk).read)
+        self.assertEqual(UnreadCounter.get_count(self.user), 0)
+
+    def test_mark_listed_ids_and_up_to_id(self):
+        ids = [self.notifications[0].id, self.notifications[1].id, self.foreign.id]
+        self.assertEqual(self.mark_read({"ids": ids}).data, {"updated": 2})
+        self.assertEqual(self.mark_read({"up_to_id": self.notifications[3].id}).data, {"updated": 2})
+        self.assertEqual(UnreadCounter.get_count(self.user), 2)
+
+    def test_requires_exactly_one_selector(self):
+        self.assertEqual(self.mark_read({}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.mark_read({"all": True, "up_to_id": 3})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_prune_deletes_only_old_read_notifications(self):
+        old = timezone.now() - timedelta(days=40)
+        Notification.objects.filter(pk__in=[n.pk for n in self.notifications[:4]]).update(timestamp=old)
+        Notification.objects.filter(pk__in=[n.pk for n in self.notifications[:2]]).update(read=True)
+
+        response = self.client.post(reverse("notification-prune"), {"older_than_days": 30}, format="json")
+
+        self.assertEqual(response.data, {"deleted": 2})
+        self.assertEqual(Notification.objects.filter(recipient=self.user).count(), 4)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, NOTIFICATION_QUEUE_ASYNC=False)
+class NotificationStreamTests(APITestCase):
+    def setUp(self):
+        notification_queue.clear()
+        self.user = User.objects.create_user(username="recipient", password="testpass123")
+        self.actor = User.objects.create_user(username="actor", password="testpass123")
+        self.token = Token.objects.create(user=self.user)
+
+    async def test_stream_requires_a_token(self):
+        response = await AsyncClient().get(reverse("notification-stream"))
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_stream_is_refused_under_wsgi(self):
+        response = self.client.get(
+            reverse("notification-stream"),
+            headers={"Authorization": f"Token {self.token.key}"},
+        )
+
+        self.assertEqual(response.status_code, 501)
+        self.assertNotIsInstance(response, StreamingHttpResponse)
+        self.assertFalse(get_broker().has_subscribers({self.user.pk}))
+
+    async def test_stream_pushes_published_notifications(self):
+        response = await AsyncClient().get(
+            reverse("notification-stream"),
+            headers={"Authorization": f"Token {self.token.key}"},
+        )
+        events = aiter(response.streaming_content)
+
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual(await anext(events), b"retry: 5000\n\n")
+
+        await sync_to_async(self.deliver_follow)()
+        chunk = (await anext(events)).decode()
+
+        self.assertTrue(chunk.startswith("id: "))
+        self.assertIn('"summary": "actor started following you"', chunk)
+        self.assertTrue(get_broker().has_subscribers({self.user.pk}))
+
+    def deliver_follow(self):
+        notification_queue.put(NotificationEvent(self.user.id, self.actor.id, "started following you", None, None))
+        with self.captureOnCommitCallbacks(execute=True):
+            notification_queue.drain()
+
+
+class InMemoryBrokerTests(APITestCase):
+    async def test_publish_reaches_only_the_recipient(self):
+        broker = InMemoryBroker()
+        mine, theirs = broker.subscribe(1), broker.subscribe(2)
+
+        broker.publish(1, {"id": 7})
+
+        self.assertEqual(await mine.get(timeout=1), {"id": 7})
+        self.assertIsNone(await theirs.get(timeout=0.01))
+        mine.close()
+        self.assertEqual(broker.connection_count(), 1)
@@ -1,7 +1,18 @@
 from django.urls import path
-from .views import NotificationListView, NotificationMarkReadView
+from .views import (
+    BulkMarkReadView,
+    NotificationListView,
+    NotificationMarkReadView,
+    PruneNotificationsView,
+    UnreadCountView,
+    notification_stream,
+)
 
 urlpatterns = [
     path("", NotificationListView.as_view(), name="notifications"),
     path("<int:pk>/read/", NotificationMarkReadView.as_view(), name="notification-read"),
+    path("mark-read/", BulkMarkReadView.as_view(), name="notification-mark-read"),
+    path("prune/", PruneNotificationsView.as_view(), name="notification-prune"),
+    path("stream/", notification_stream, name="notification-stream"),
+    path("unread-count/", UnreadCountView.as_view(), name="notification-unread-count"),
 ]
@@ -1,22 +1,26 @@
 from django.contrib.contenttypes.models import ContentType
-from .models import Notification
+
+from .queue import NotificationEvent, notification_queue
 
 
 def create_notification(recipient, actor, verb, target=None):
-    content_type = None
+    """Queue a notification; it is written in a batch after the current
+    transaction commits. ContentType lookups are served from Django's
+    per-process ContentType cache."""
+    content_type_id = None
     object_id = None
 
-    if target:
-        content_type = ContentType.objects.get_for_model(target)
-        object_id = target.id
+    if target is not None:
+        content_type_id = ContentType.objects.get_for_model(target).id
+        object_id = target.pk
 
-    return Notification.objects.create(
-        recipient=recipient,
-        actor=actor,
+    notification_queue.put_on_commit(NotificationEvent(
+        recipient_id=recipient.pk,
+        actor_id=actor.pk,
         verb=verb,
-        content_type=content_type,
+        content_type_id=content_type_id,
         object_id=object_id,
-    )
+    ))
 
 
 def create_notification_for_like(actor, recipient, post):
@@ -29,3 +33,23 @@ def create_notification_for_like(actor, recipient, post):
         verb="liked your post",
         target=post,
     )
+
+
+def create_notification_for_comment(actor, recipient, post):
+    if actor == recipient:
+        return None
+
+    return create_notification(
+        recipient=recipient,
+        actor=actor,
+        verb="commented on your post",
+        target=post,
+    )
+
+
+def create_notification_for_follow(actor, recipient):
+    return create_notification(
+        recipient=recipient,
+        actor=actor,
+        verb="started following you",
+    )
@@ -1,16 +1,40 @@
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from rest_framework import generics, permissions
-from .models import Notification
-from .serializers import NotificationSerializer
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .broker import get_broker
+from .models import Notification, UnreadCounter
+from .serializers import BulkMarkReadSerializer, NotificationSerializer, PruneSerializer
+from accounts.authentication import CachedTokenAuthentication
+from social_media_api.pagination import KeysetPagination
+from social_media_api.fastread import FastReadViewMixin
+from social_media_api.sparse import SparseFieldsetViewMixin
+
+
+class NotificationPagination(KeysetPagination):
+    ordering = ("-timestamp", "-id")
 
 
-class NotificationListView(generics.ListAPIView):
+class NotificationListView(FastReadViewMixin, SparseFieldsetViewMixin, generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationPagination
 
     def get_queryset(self):
-        return Notification.objects.filter(
-            recipient=self.request.user
-        )
+        queryset = Notification.objects.filter(recipient=self.request.user)
+        if {"actor_username", "summary"} & set(self.sparse_fields()):
+            queryset = queryset.select_related("actor")
+        return self.narrow_queryset(queryset)
 
 
 class NotificationMarkReadView(generics.UpdateAPIView):
@@ -18,5 +42,134 @@ class NotificationMarkReadView(generics.UpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     queryset = Notification.objects.all()
 
+    def get_queryset(self):
+        return Notification.objects.filter(recipient=self.request.user)
+
+    @transaction.atomic
     def perform_update(self, serializer):
-        serializer.save(read=True)
+        # A conditional UPDATE rather than read-then-save: of two concurrent
+        # requests only the one that flips the row lowers the counter.
+        notification = serializer.instance
+        marked = Notification.objects.filter(pk=notification.pk, read=False).update(read=True)
+        UnreadCounter.add({self.request.user.pk: -marked})
+        notification.read = True
+
+
+class UnreadCountView(APIView):
+    """Badge count for polling clients.
+
+    Answers from the UnreadCounter row and supports If-None-Match, so an
+    unchanged badge costs one primary-key lookup and an empty 304.
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        count = UnreadCounter.get_count(request.user)
+        etag = f'"unread-{request.user.pk}-{count}"'
+
+        response = get_conditional_response(request, etag=etag) or Response({"unread_count": count})
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+
+class BulkMarkReadView(generics.GenericAPIView):
+    """Mark many notifications read with one UPDATE."""
+
+    serializer_class = BulkMarkReadSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    @transaction.atomic
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        unread = Notification.objects.filter(recipient=request.user, read=False)
+        updated = serializer.filter_queryset(unread).update(read=True)
+        UnreadCounter.add({request.user.pk: -updated})
+
+        return Response({"updated": updated})
+
+
+class PruneNotificationsView(generics.GenericAPIView):
+    """Delete the caller's read notifications older than N days."""
+
+    serializer_class = PruneSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        cutoff = timezone.now() - timedelta(days=serializer.validated_data["older_than_days"])
+        deleted, _ = Notification.objects.filter(
+            recipient=request.user,
+            read=True,
+            timestamp__lt=cutoff,
+        ).delete()
+
+        return Response({"deleted": deleted})
+
+
+# ============================
+# PUSH STREAM (ASGI ONLY)
+# ============================
+
+async def _stream_user(request):
+    # EventSource cannot send headers, so the token may also be passed as
+    # ?token=. Prefer the header wherever the client allows it.
+    header = request.headers.get("Authorization", "")
+    key = header[len("Token "):] if header.startswith("Token ") else request.GET.get("token")
+    if not key:
+        return None
+    try:
+        user, _ = await sync_to_async(CachedTokenAuthentication().authenticate_credentials)(key)
+    except AuthenticationFailed:
+        return None
+    return user
+
+
+async def notification_stream(request):
+    """Server-Sent Events stream of the caller's new notifications.
+
+    An idle connection is an async generator parked on the broker queue, so
+    it holds no thread. Serve this through an ASGI server (uvicorn, daphne).
+    Under WSGI the response iterator is drained to completion before anything
+    is sent, so an endless stream would pin a worker and never flush; such
+    requests get a 501 instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {"detail": "The notification stream is only served by the ASGI server."},
+            status=501,
+        )
+    user = await _stream_user(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+
+    heartbeat = getattr(settings, "NOTIFICATION_STREAM_HEARTBEAT", 15)
+
+    async def events():
+        subscription = get_broker().subscribe(user.pk)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                message = await subscription.get(timeout=heartbeat)
+                if message is None:
+                    yield ": keepalive\n\n"
+                else:
+                    yield (
+                        f"id: {message['id']}\n"
+                        "event: notification\n"
+                        f"data: {json.dumps(message)}\n\n"
+                    )
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
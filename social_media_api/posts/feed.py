@@ -0,0 +1,187 @@
+"""
+Materialized home feeds.
+
+When a post is created it is fanned out: one FeedEntry row is written for
+every follower of its author, so reading a feed is an indexed range scan
+over the reader's own rows instead of an IN-subquery over every followed
+author's posts.
+
+Authors with more than FEED_FANOUT_FOLLOWER_LIMIT followers are never
+fanned out. Their posts (and any post whose fan-out has not finished yet)
+keep ``fanned_out=False`` and are merged into the feed at read time.
+"""
+
+import heapq
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from accounts import graph
+
+from .models import FeedEntry, Post
+
+logger = logging.getLogger(__name__)
+
+FANOUT_BATCH_SIZE = 1000
+
+_executor = None
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="feed-fanout")
+    return _executor
+
+
+# ============================
+# WRITE PATH
+# ============================
+
+def fan_out_post(post_id):
+    """Copy a post into its author's followers' feeds.
+
+    Returns the number of followers the post was delivered to, or None when
+    the author is too popular and the post stays pull-only.
+    """
+    post = Post.objects.filter(pk=post_id).select_related("author").first()
+    if post is None or post.fanned_out:
+        return 0
+
+    followers = graph.follower_ids(post.author_id)
+    if len(followers) > _setting("FEED_FANOUT_FOLLOWER_LIMIT", 10000):
+        return None
+
+    delivered = 0
+    batch = []
+    for follower_id in followers:
+        batch.append(FeedEntry(
+            user_id=follower_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            created_at=post.created_at,
+        ))
+        if len(batch) >= FANOUT_BATCH_SIZE:
+            FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            delivered += len(batch)
+            batch = []
+    if batch:
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+        delivered += len(batch)
+
+    Post.objects.filter(pk=post.pk).update(fanned_out=True)
+    return delivered
+
+
+def _run_fan_out(post_id):
+    close_old_connections()
+    try:
+        fan_out_post(post_id)
+    except Exception:
+        logger.exception("Fan-out failed for post %s", post_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_fan_out(post):
+    """Fan a newly created post out once the creating transaction commits.
+
+    With FEED_FANOUT_ASYNC the work runs on a background worker thread so it
+    stays off the request path; the post is still visible in the meantime
+    through the read-time merge.
+    """
+    def dispatch():
+        if _setting("FEED_FANOUT_ASYNC", True):
+            _get_executor().submit(_run_fan_out, post.pk)
+        else:
+            fan_out_post(post.pk)
+
+    transaction.on_commit(dispatch)
+
+
+def backfill_feed(user, author_ids):
+    """Copy the recent fanned-out posts of newly followed authors into ``user``'s feed.
+
+    Up to FEED_BACKFILL_LIMIT posts are taken per author, in one query.
+    """
+    recent = Window(
+        RowNumber(),
+        partition_by=F("author_id"),
+        order_by=[F("created_at").desc(), F("id").desc()],
+    )
+    posts = (
+        Post.objects.filter(author_id__in=author_ids, fanned_out=True)
+        .annotate(recency=recent)
+        .filter(recency__lte=_setting("FEED_BACKFILL_LIMIT", 500))
+        .values_list("id", "author_id", "created_at")
+    )
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(user=user, post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, author_id, created_at in posts
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def prune_feed(user, author_ids):
+    """Drop unfollowed authors' posts from a former follower's feed."""
+    FeedEntry.objects.filter(user=user, author_id__in=author_ids).delete()
+
+
+# ============================
+# READ PATH
+# ============================
+
+def _before(created_at_field, id_field, before):
+    created_at, pk = before
+    return Q(**{f"{created_at_field}__lt": created_at}) | Q(
+        **{created_at_field: created_at, f"{id_field}__lt": pk}
+    )
+
+
+def get_feed(user, limit, before=None, queryset=None):
+    """Return up to ``limit`` posts for ``user``'s feed, newest first.
+
+    ``before`` is an optional ``(created_at, id)`` key; only posts strictly
+    older than it are returned, which makes every page an index range scan.
+    The selected posts are loaded from ``queryset`` (default: posts with
+    their authors) so callers can add annotations.
+    """
+    following_ids = graph.following_ids(user.pk)
+    if not following_ids:
+        return []
+
+    entries = FeedEntry.objects.filter(user=user)
+    pulled = Post.objects.filter(fanned_out=False, author_id__in=following_ids)
+    if before is not None:
+        entries = entries.filter(_before("created_at", "post_id", before))
+        pulled = pulled.filter(_before("created_at", "id", before))
+
+    pushed_keys = entries.order_by("-created_at", "-post_id").values_list("created_at", "post_id")[:limit]
+    pulled_keys = pulled.order_by("-created_at", "-id").values_list("created_at", "id")[:limit]
+
+    post_ids = []
+    seen = set()
+    for _, post_id in heapq.merge(pushed_keys, pulled_keys, reverse=True):
+        if post_id not in seen:
+            seen.add(post_id)
+            post_ids.append(post_id)
+        if len(post_ids) == limit:
+            break
+
+    if queryset is None:
+        queryset = Post.objects.select_related("author")
+    posts = {}
+    for row in queryset.filter(pk__in=post_ids):
+        # Model instances, or dicts when the caller passed a .values() queryset.
+        posts[row["id"] if isinstance(row, dict) else row.pk] = row
+    return [posts[post_id] for post_id in post_ids if post_id in posts]
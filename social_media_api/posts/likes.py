@@ -0,0 +1,90 @@
+"""
+Race-free like/unlike.
+
+Liking is one conditional INSERT (``ON CONFLICT DO NOTHING`` on the
+(user, post) unique constraint) and unliking one DELETE, so two concurrent
+requests for the same pair can never both succeed or raise IntegrityError.
+Only a statement that actually changed a row goes on to bump
+``Post.like_count``, and that UPDATE returns the new count, so repeated
+calls are idempotent and the counter stays exact under contention.
+
+Neither statement sends model signals, so a change bumps the response
+cache scopes directly.
+
+Requires a backend with ``ON CONFLICT`` and ``RETURNING`` (SQLite 3.35+,
+PostgreSQL). A SQLite deployment with concurrent writers should open its
+connections with ``"transaction_mode": "IMMEDIATE"`` so that writers wait
+for the lock instead of failing with "database is locked". LikeConcurrencyTests
+runs that way.
+"""
+
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from social_media_api.response_cache import bump
+
+from .models import Like, Post
+from .signals import post_scopes
+
+LikeState = namedtuple("LikeState", ["changed", "like_count", "author_id"])
+
+
+def _tables():
+    qn = connection.ops.quote_name
+    return qn(Like._meta.db_table), qn(Post._meta.db_table)
+
+
+def _current(cursor, post_table, post_id):
+    cursor.execute(f"SELECT like_count, author_id FROM {post_table} WHERE id = %s", [post_id])
+    row = cursor.fetchone()
+    return None if row is None else LikeState(False, *row)
+
+
+def like_post(user_id, post_id):
+    """Like ``post_id`` as ``user_id``. Returns a LikeState, or None if the post does not exist."""
+    like_table, post_table = _tables()
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Selecting from the post table turns a missing post into a no-op
+        # instead of a foreign key error.
+        cursor.execute(
+            f"INSERT INTO {like_table} (user_id, post_id, created_at) "
+            f"SELECT %s, id, %s FROM {post_table} WHERE id = %s "
+            "ON CONFLICT (user_id, post_id) DO NOTHING",
+            [user_id, timezone.now(), post_id],
+        )
+        if cursor.rowcount != 1:
+            return _current(cursor, post_table, post_id)
+
+        cursor.execute(
+            f"UPDATE {post_table} SET like_count = like_count + 1 WHERE id = %s "
+            "RETURNING like_count, author_id",
+            [post_id],
+        )
+        state = LikeState(True, *cursor.fetchone())
+    bump(*post_scopes(post_id))
+    return state
+
+
+def unlike_post(user_id, post_id):
+    """Remove ``user_id``'s like. Returns a LikeState, or None if the post does not exist."""
+    like_table, post_table = _tables()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {like_table} WHERE user_id = %s AND post_id = %s",
+            [user_id, post_id],
+        )
+        if cursor.rowcount != 1:
+            return _current(cursor, post_table, post_id)
+
+        cursor.execute(
+            f"UPDATE {post_table} SET like_count = like_count - 1 "
+            "WHERE id = %s AND like_count > 0 "
+            "RETURNING like_count, author_id",
+            [post_id],
+        )
+        row = cursor.fetchone()
+        state = LikeState(True, *row) if row else _current(cursor, post_table, post_id)
+    bump(*post_scopes(post_id))
+    return state
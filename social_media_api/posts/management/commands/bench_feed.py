@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.feed import get_feed
+from posts.models import FeedEntry, Post
+from social_media_api.benchmark import format_row, manual_timestamps, measure, rolled_back
+
+User = get_user_model()
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = "Compare feed latency of the materialized feed against the old IN-subquery."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+        parser.add_argument("--authors", type=int, default=1000)
+        parser.add_argument("--followed", type=int, default=100)
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--page-size", type=int, default=20)
+
+    def handle(self, *args, **options):
+        for size in options["sizes"]:
+            with rolled_back():
+                reader = self.build_fixture(size, options["authors"], options["followed"])
+                self.stdout.write(f"\n{size} posts, {options['followed']} followed authors")
+                self.run(reader, options["iterations"], options["page_size"])
+
+    def build_fixture(self, size, author_count, followed_count):
+        users = User.objects.bulk_create(
+            [User(username=f"bench-user-{i}", password="!") for i in range(author_count + 1)]
+        )
+        reader, authors = users[0], users[1:]
+        followed = authors[:followed_count]
+        reader.following.add(*followed)
+        followed_ids = {author.id for author in followed}
+
+        now = timezone.now()
+        with manual_timestamps(Post, "created_at"):
+            for start in range(0, size, BATCH_SIZE):
+                posts = Post.objects.bulk_create([
+                    Post(
+                        author=authors[i % len(authors)],
+                        title=f"Post {i}",
+                        content="Lorem ipsum dolor sit amet. " * 8,
+                        created_at=now - timedelta(seconds=size - i),
+                        fanned_out=True,
+                    )
+                    for i in range(start, min(size, start + BATCH_SIZE))
+                ])
+                FeedEntry.objects.bulk_create([
+                    FeedEntry(user=reader, post=post, author_id=post.author_id, created_at=post.created_at)
+                    for post in posts
+                    if post.author_id in followed_ids
+                ])
+        return reader
+
+    def run(self, reader, iterations, page_size):
+        following = reader.following.all()
+
+        def legacy_all():
+            list(Post.objects.filter(author__in=following).order_by("-created_at"))
+
+        def legacy_page():
+            list(Post.objects.filter(author__in=following).order_by("-created_at")[:page_size])
+
+        def materialized_page():
+            get_feed(reader, page_size)
+
+        self.stdout.write(format_row("current query (full result)", measure(legacy_all, iterations)))
+        self.stdout.write(format_row("current query (first page)", measure(legacy_page, iterations)))
+        self.stdout.write(format_row("materialized feed (first page)", measure(materialized_page, iterations)))
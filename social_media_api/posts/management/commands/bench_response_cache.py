@@ -0,0 +1,93 @@
+import random
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from posts.likes import like_post
+from posts.models import Post
+from posts.views import PostViewSet
+from social_media_api.benchmark import rolled_back
+
+User = get_user_model()
+
+
+class UncachedPostViewSet(PostViewSet):
+    cached_actions = ()
+
+
+class Command(BaseCommand):
+    help = "Replay a read-mostly post workload with and without the response cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=500)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--write-ratio", type=float, default=0.05)
+        parser.add_argument("--hot", type=int, default=50, help="Posts receiving 80%% of the traffic.")
+
+    def handle(self, *args, **options):
+        with rolled_back():
+            user = User.objects.create(username="bench-cache-user", password="!")
+            Post.objects.bulk_create([
+                Post(author=user, title=f"Post {i}", content="x" * 500) for i in range(options["posts"])
+            ])
+            post_ids = list(Post.objects.filter(author=user).values_list("pk", flat=True))
+            fans = User.objects.bulk_create([
+                User(username=f"bench-cache-fan-{i}", password="!") for i in range(200)
+            ])
+
+            rng = random.Random(0)
+            workload = []
+            for _ in range(options["requests"]):
+                pool = post_ids[: options["hot"]] if rng.random() < 0.8 else post_ids
+                post_id = rng.choice(pool)
+                if rng.random() < options["write_ratio"]:
+                    workload.append(("like", post_id, rng.choice(fans).pk))
+                else:
+                    workload.append(("list" if rng.random() < 0.2 else "retrieve", post_id, None))
+
+            self.stdout.write(
+                f"{options['requests']} requests, {options['write_ratio']:.0%} likes, "
+                f"{options['hot']} hot posts of {options['posts']}"
+            )
+            for label, viewset in (("uncached", UncachedPostViewSet), ("cached", PostViewSet)):
+                # Each pass starts from the same likes.
+                with rolled_back():
+                    self.replay(label, viewset, user, workload)
+
+    def replay(self, label, viewset, user, workload):
+        factory = APIRequestFactory(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        list_view = viewset.as_view({"get": "list"})
+        detail_view = viewset.as_view({"get": "retrieve"})
+
+        samples, hits, reads = [], 0, 0
+        for kind, post_id, fan_id in workload:
+            if kind == "like":
+                like_post(fan_id, post_id)
+                continue
+
+            if kind == "list":
+                request, view, kwargs = factory.get("/api/posts/"), list_view, {}
+            else:
+                request, view, kwargs = factory.get(f"/api/posts/{post_id}/"), detail_view, {"pk": post_id}
+            force_authenticate(request, user)
+
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                view(request, **kwargs).render()
+                samples.append((time.perf_counter() - start) * 1000)
+            reads += 1
+            hits += not queries
+
+        samples.sort()
+        self.stdout.write(
+            f"{label:<10} hit ratio={hits / reads:6.1%}  "
+            f"p50={samples[len(samples) // 2]:7.3f}ms  "
+            f"p99={samples[min(len(samples) - 1, int(len(samples) * 0.99))]:7.3f}ms  "
+            f"mean={statistics.fmean(samples):7.3f}ms"
+        )
@@ -0,0 +1,76 @@
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from posts import search
+from posts.models import Post
+from social_media_api.benchmark import format_row, measure, rolled_back
+
+User = get_user_model()
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = "Time post search queries against a large synthetic corpus."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=1_000_000)
+        parser.add_argument("--vocabulary", type=int, default=20000)
+        parser.add_argument("--words", type=int, default=40, help="Words per post.")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--scan-iterations", type=int, default=3)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        vocabulary = [f"w{i:05d}" for i in range(options["vocabulary"])]
+        # Zipf-like: low-numbered words are common, high-numbered ones rare.
+        cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+        with rolled_back():
+            user = User.objects.create(username="bench-search-user", password="!")
+            start = time.perf_counter()
+            for offset in range(0, options["posts"], BATCH_SIZE):
+                count = min(BATCH_SIZE, options["posts"] - offset)
+                Post.objects.bulk_create([
+                    Post(
+                        author=user,
+                        title=" ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=5)),
+                        content=" ".join(rng.choices(vocabulary, cum_weights=cum_weights, k=options["words"])),
+                    )
+                    for _ in range(count)
+                ])
+            loaded = time.perf_counter() - start
+
+            backend = search.get_backend()
+            start = time.perf_counter()
+            backend.rebuild()
+            indexed = time.perf_counter() - start
+            self.stdout.write(
+                f"{options['posts']} posts loaded in {loaded:.1f}s, "
+                f"indexed by {type(backend).__name__} in {indexed:.1f}s"
+            )
+
+            common, mid, rare = vocabulary[0], vocabulary[100], vocabulary[-1]
+            deep = backend.search(search.parse_query(mid), 1000)[-1]
+            cases = [
+                (f"common word ({common})", common, None),
+                (f"mid word ({mid})", mid, None),
+                (f"rare word ({rare})", rare, None),
+                ("prefix (w0001*)", "w0001*", None),
+                (f"two words ({mid} {common})", f"{mid} {common}", None),
+                ("mid word, after 1000 hits", mid, (deep.position, deep.window)),
+            ]
+            for label, query, after in cases:
+                terms = search.parse_query(query)
+                result = measure(lambda: backend.search(terms, 21, after), options["iterations"])
+                self.stdout.write(format_row(label, result))
+
+            # The unindexed alternative, unranked and newest first.
+            for label, word in (("mid", mid), ("rare", rare)):
+                scan = Post.objects.filter(content__icontains=word).order_by("-id")[:21]
+                result = measure(lambda: list(scan.all()), options["scan_iterations"], warmup=1)
+                self.stdout.write(format_row(f"icontains scan ({label} word)", result))
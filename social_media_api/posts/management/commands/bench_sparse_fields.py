@@ -0,0 +1,52 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from posts.models import Post
+from posts.views import PostViewSet
+from social_media_api.benchmark import format_row, measure, rolled_back
+
+User = get_user_model()
+
+VARIANTS = [
+    ("full representation", {}),
+    ("?view=summary", {"view": "summary"}),
+    ("?fields=id,title", {"fields": "id,title"}),
+    ("?omit=content", {"omit": "content"}),
+]
+
+
+class Command(BaseCommand):
+    help = "Compare payload size and query+serialization time of sparse post pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=1000)
+        parser.add_argument("--content-length", type=int, default=2000)
+        parser.add_argument("--iterations", type=int, default=30)
+
+    def handle(self, *args, **options):
+        page_size = options["page_size"]
+        with rolled_back():
+            user = User.objects.create(username="bench-sparse-user", password="!")
+            Post.objects.bulk_create([
+                Post(author=user, title=f"Post {i}", content="x" * options["content_length"])
+                for i in range(page_size)
+            ])
+
+            factory = APIRequestFactory()
+            self.stdout.write(f"{page_size} posts per page, {options['content_length']}-char content")
+            for label, params in VARIANTS:
+                request = Request(factory.get("/api/posts/", params))
+                request.user = user
+                view = PostViewSet(request=request, action="list", format_kwarg=None)
+
+                def render():
+                    posts = view.get_queryset().order_by("-created_at", "-id")[:page_size]
+                    serializer = view.get_serializer(posts, many=True)
+                    return JSONRenderer().render(serializer.data)
+
+                size = len(render())
+                result = measure(render, options["iterations"])
+                self.stdout.write(f"{format_row(label, result)}  payload={size / 1024:8.1f} KiB")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = "Rebuild the trending tables. Run every few minutes, e.g. from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window",
+            choices=list(trending.WINDOWS),
+            action="append",
+            help="Window to rebuild (repeatable). Defaults to all.",
+        )
+
+    def handle(self, *args, **options):
+        for window in options["window"] or trending.WINDOWS:
+            kept = trending.recompute(window)
+            self.stdout.write(self.style.SUCCESS(f"Trending ({window}): {kept} post(s)."))
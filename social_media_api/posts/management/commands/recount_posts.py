@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Like, Post
+
+
+def counted(model):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(post=OuterRef("pk"))
+            .order_by()
+            .values("post")
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = "Repair drift in Post.like_count and Post.comment_count."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        repaired = 0
+        last_id = 0
+
+        while True:
+            ids = list(
+                Post.objects.filter(pk__gt=last_id)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            last_id = ids[-1]
+
+            drifted = (
+                Post.objects.filter(pk__in=ids)
+                .annotate(actual_likes=counted(Like), actual_comments=counted(Comment))
+                .filter(~Q(like_count=F("actual_likes")) | ~Q(comment_count=F("actual_comments")))
+                .values_list("pk", flat=True)
+            )
+            repaired += Post.objects.filter(pk__in=list(drifted)).update(
+                like_count=counted(Like),
+                comment_count=counted(Comment),
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Repaired counters on {repaired} post(s)."))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.9 on 2026-10-18 17:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_comment_author_post_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.CharField(choices=[('hour', 'Past hour'), ('day', 'Past day'), ('week', 'Past week')], max_length=8)),
+                ('post_created_at', models.DateTimeField()),
+                ('score', models.FloatField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trending_scores', to='posts.post')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['window', '-score'], name='posts_trending_rank_idx')],
+                'unique_together': {('window', 'post')},
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.9 on 2026-10-18 18:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Spelled out rather than imported from posts.search, which this
+# migration must outlive unchanged; keep the two names equal.
+FTS_TABLE = "posts_post_search"
+
+
+def create_fts_table(apps, schema_editor):
+    """Create and fill the FTS5 index when running on SQLite."""
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    # Prefix indexes keep "word*" queries of up to five characters from
+    # merging the postings of every matching word.
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+        "title, content, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3 4 5')"
+    )
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, content) SELECT id, title, content FROM posts_post"
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_comment_post_created_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.post')),
+            ],
+            options={
+                'unique_together': {('term', 'post')},
+            },
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -1,5 +1,47 @@
 from django.db import models
 from django.conf import settings
+from django.db.models.functions import Concat, Length, Substr
+
+
+EXCERPT_LENGTH = 200
+
+
+class PostQuerySet(models.QuerySet):
+    def with_viewer_state(self, user, fields=("liked_by_me", "commented_by_me")):
+        """Annotate ``liked_by_me`` and/or ``commented_by_me`` for ``user``.
+
+        Both are EXISTS subqueries inside the list query itself, so the
+        query count does not grow with the page size.
+        """
+        if not user.is_authenticated:
+            return self.annotate(**{name: models.Value(False) for name in fields})
+
+        annotations = {}
+        if "liked_by_me" in fields:
+            annotations["liked_by_me"] = models.Exists(
+                Like.objects.filter(post=models.OuterRef("pk"), user=user)
+            )
+        if "commented_by_me" in fields:
+            annotations["commented_by_me"] = models.Exists(
+                Comment.objects.filter(post=models.OuterRef("pk"), author=user)
+            )
+        return self.annotate(**annotations)
+
+    def with_excerpt(self):
+        """Annotate ``excerpt``: the start of ``content``, cut in the database."""
+        return self.alias(content_length=Length("content")).annotate(
+            excerpt=models.Case(
+                models.When(
+                    content_length__gt=EXCERPT_LENGTH,
+                    then=Concat(
+                        Substr("content", 1, EXCERPT_LENGTH),
+                        models.Value("…"),
+                        output_field=models.TextField(),
+                    ),
+                ),
+                default="content",
+            )
+        )
 
 
 class Post(models.Model):
@@ -13,8 +55,28 @@ class Post(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # True once the post has been copied into every follower's FeedEntry
+    # rows. Until then (and always for very popular authors) the feed pulls
+    # the post at read time instead.
+    fanned_out = models.BooleanField(default=False)
+
+    # Denormalized counters, maintained with F() expressions by the like and
+    # comment views. ``manage.py recount_posts`` repairs any drift.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    objects = PostQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="posts_post_created_id_idx"),
+            models.Index(
+                fields=["author", "-created_at"],
+                name="posts_post_pull_idx",
+                condition=models.Q(fanned_out=False),
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} by {self.author.username}"
@@ -37,6 +99,13 @@ class Comment(models.Model):
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="posts_comment_created_id_idx"),
+            # Per-post comment pages and previews.
+            models.Index(fields=["post", "created_at", "id"], name="posts_comment_post_created_idx"),
+            # Serves the commented_by_me EXISTS probe.
+            models.Index(fields=["author", "post"], name="posts_comment_author_post_idx"),
+        ]
 
     def __str__(self):
         return f"Comment by {self.author.username} on post {self.post_id}"
@@ -61,3 +130,89 @@ class Like(models.Model):
 
     def __str__(self):
         return f"{self.user.username} liked post {self.post_id}"
+
+
+class FeedEntry(models.Model):
+    """A post materialized into one follower's home feed."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+    )
+    # Copied from the post so the feed can be read and pruned from this
+    # table alone.
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ("user", "post")
+        ordering = ["-created_at", "-post_id"]
+        indexes = [
+            models.Index(
+                fields=["user", "-created_at", "-post"],
+                name="posts_feed_user_created_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} in feed of user {self.user_id}"
+
+
+class TrendingScore(models.Model):
+    """A post's hotness within one trending window (see posts/trending.py)."""
+
+    HOUR, DAY, WEEK = "hour", "day", "week"
+    WINDOW_CHOICES = [(HOUR, "Past hour"), (DAY, "Past day"), (WEEK, "Past week")]
+
+    window = models.CharField(max_length=8, choices=WINDOW_CHOICES)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="trending_scores",
+    )
+    # Copied from the post so expired rows can be skipped and pruned
+    # without a join.
+    post_created_at = models.DateTimeField()
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ("window", "post")
+        indexes = [
+            models.Index(fields=["window", "-score"], name="posts_trending_rank_idx"),
+        ]
+
+    def __str__(self):
+        return f"Post {self.post_id} scores {self.score:.3f} for the past {self.window}"
+
+
+class PostSearchTerm(models.Model):
+    """One row of the portable inverted index (posts/search.py).
+
+    Only used when the database has no native full-text search.
+    """
+
+    term = models.CharField(max_length=64)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="search_terms",
+    )
+    # Occurrences in the post, title occurrences counting double.
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        # Also serves exact and prefix (range) lookups on term.
+        unique_together = ("term", "post")
+
+    def __str__(self):
+        return f"{self.term!r} in post {self.post_id}"
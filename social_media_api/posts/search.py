@@ -0,0 +1,195 @@
+"""
+Full-text search over post titles and content.
+
+Queries are split into words; every word must match (``AND``) and a word
+ending in ``*`` matches as a prefix, so ``djan* orm`` finds "Django ORM
+tips". Hits are ranked by relevance, best first, with title matches
+counting double, ties going to the newer post.
+
+Ranking has to score every match before the best can be picked, which for
+a word that appears in most posts means most of the table. Only matches
+inside a *window* of post ids are therefore ranked: the first page fixes
+it to the newest POST_SEARCH_RANK_WINDOW matches, and later pages reuse it
+from the cursor together with the position to continue from. Scores are
+not usable as a keyset because BM25 depends on corpus-wide statistics, so
+every write to the index shifts them; positions within a fixed window
+stay put while posts are added.
+
+Two backends implement the same interface:
+
+* ``FTS5Backend``, an SQLite FTS5 virtual table ranked with BM25. This is
+  the default on SQLite.
+* ``TermIndexBackend``, an inverted index kept in the PostSearchTerm table
+  and ranked by term frequency. It works on any database and is the
+  default elsewhere.
+
+POST_SEARCH_BACKEND selects another class by dotted path. posts/signals.py
+keeps the index in step with ``Post.save()`` and ``delete()``; writes that
+bypass signals (``bulk_create``, ``update()``) need ``rebuild_post_search``.
+"""
+
+import re
+from collections import Counter, namedtuple
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Max, Q, Sum, Value, When
+from django.utils.module_loading import import_string
+
+from .models import Post, PostSearchTerm
+
+# Created by migration 0009 on SQLite.
+FTS_TABLE = "posts_post_search"
+
+TITLE_WEIGHT = 2
+MAX_QUERY_TERMS = 8
+MAX_TERM_LENGTH = PostSearchTerm._meta.get_field("term").max_length
+
+# ``position`` counts from 1 within the window (lowest, highest post id).
+Hit = namedtuple("Hit", ["post_id", "score", "position", "window"])
+
+_WORD = re.compile(r"\w+")
+_QUERY_WORD = re.compile(r"(\w+)(\*?)")
+
+
+def _rank_window():
+    return getattr(settings, "POST_SEARCH_RANK_WINDOW", 10000)
+
+
+def _hits(rows, offset, window):
+    return [Hit(post_id, score, offset + i, window) for i, (post_id, score) in enumerate(rows, 1)]
+
+
+def tokenize(text):
+    return [word[:MAX_TERM_LENGTH] for word in _WORD.findall(text.lower())]
+
+
+def parse_query(query):
+    """``(word, is_prefix)`` pairs for ``query``; punctuation is ignored.
+
+    django_blog's blog.search.parse_query accepts the same syntax. The two
+    projects share no package, so a change to either belongs in both.
+    Words are cut to MAX_TERM_LENGTH so they can equal a stored term.
+    """
+    terms = []
+    for word, star in _QUERY_WORD.findall(query.lower()):
+        term = (word[:MAX_TERM_LENGTH], bool(star))
+        if term not in terms:
+            terms.append(term)
+    return terms[:MAX_QUERY_TERMS]
+
+
+class FTS5Backend:
+    def index(self, post):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content) VALUES (%s, %s, %s)",
+                [post.pk, post.title, post.content],
+            )
+
+    def remove(self, post_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, content) "
+                f"SELECT id, title, content FROM {Post._meta.db_table}"
+            )
+
+    def search(self, terms, limit, after=None):
+        """The best ``limit`` hits after the ``(position, window)`` key ``after``."""
+        # parse_query leaves only \w characters, so wrapping each in double
+        # quotes makes it an FTS5 string: a search for "title OR x" looks
+        # for the word "or" rather than widening the match.
+        match = " ".join(f'"{word}"' + ("*" if prefix else "") for word, prefix in terms)
+        with connection.cursor() as cursor:
+            if after is None:
+                offset = 0
+                cursor.execute(f"SELECT MAX(rowid) FROM {FTS_TABLE}")
+                ceiling = cursor.fetchone()[0] or 0
+                cursor.execute(
+                    f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                    "ORDER BY rowid DESC LIMIT 1 OFFSET %s",
+                    [match, _rank_window() - 1],
+                )
+                row = cursor.fetchone()
+                window = (row[0] if row else 0, ceiling)
+            else:
+                offset, window = after
+
+            # Negated because bm25() falls as relevance rises; the API and
+            # the window keyset want a score that grows with it.
+            cursor.execute(
+                f"SELECT rowid, -bm25({FTS_TABLE}, %s, 1.0) AS score FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid BETWEEN %s AND %s "
+                "ORDER BY score DESC, rowid DESC LIMIT %s OFFSET %s",
+                [float(TITLE_WEIGHT), match, *window, limit, offset],
+            )
+            return _hits(cursor.fetchall(), offset, window)
+
+
+class TermIndexBackend:
+    def index(self, post):
+        weights = Counter(tokenize(post.content))
+        for word in tokenize(post.title):
+            weights[word] += TITLE_WEIGHT
+        PostSearchTerm.objects.filter(post_id=post.pk).delete()
+        PostSearchTerm.objects.bulk_create(
+            [PostSearchTerm(term=term, post_id=post.pk, weight=weight) for term, weight in weights.items()],
+            batch_size=1000,
+        )
+
+    def remove(self, post_id):
+        PostSearchTerm.objects.filter(post_id=post_id).delete()
+
+    def rebuild(self):
+        PostSearchTerm.objects.all().delete()
+        for post in Post.objects.only("title", "content").iterator(chunk_size=2000):
+            self.index(post)
+
+    def _match(self, word, prefix):
+        if not prefix:
+            return Q(term=word)
+        # A range rather than LIKE, so any B-tree index on term applies.
+        return Q(term__gte=word, term__lt=word[:-1] + chr(ord(word[-1]) + 1))
+
+    def search(self, terms, limit, after=None):
+        """The best ``limit`` hits after the ``(position, window)`` key ``after``."""
+        matches = [self._match(word, prefix) for word, prefix in terms]
+        candidates = PostSearchTerm.objects.filter(reduce(or_, matches))
+        if after is None:
+            offset = 0
+            ceiling = Post.objects.aggregate(ceiling=Max("pk"))["ceiling"] or 0
+            # Newest posts matching any word; a cheap bound on the window.
+            ids = candidates.order_by("-post_id").values_list("post_id", flat=True).distinct()
+            window = (next(iter(ids[_rank_window() - 1:_rank_window()]), 0), ceiling)
+        else:
+            offset, window = after
+
+        # One flag per query word; a post must match all of them.
+        flags = {
+            f"m{i}": Max(Case(When(match, then=Value(1)), default=Value(0)))
+            for i, match in enumerate(matches)
+        }
+        hits = (
+            candidates.filter(post_id__gte=window[0], post_id__lte=window[1])
+            .values("post_id")
+            .annotate(score=Sum("weight"), **flags)
+            .filter(**{name: 1 for name in flags})
+            .order_by("-score", "-post_id")
+            .values_list("post_id", "score")
+        )
+        return _hits(hits[offset:offset + limit], offset, window)
+
+
+def get_backend():
+    path = getattr(settings, "POST_SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    return FTS5Backend() if connection.vendor == "sqlite" else TermIndexBackend()
@@ -1,15 +1,23 @@
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from rest_framework import serializers
 from .models import Post, Comment, Like
+from social_media_api.fastread import read_plan
+from social_media_api.sparse import SparseFieldsetSerializerMixin
 
 
-class PostSerializer(serializers.ModelSerializer):
+class PostSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source="author.username")
     comments_count = serializers.IntegerField(
-        source="comments.count", read_only=True
-    )
-    like_count = serializers.IntegerField(
-        source="likes.count", read_only=True
+        source="comment_count", read_only=True
     )
+    like_count = serializers.IntegerField(read_only=True)
+    liked_by_me = serializers.SerializerMethodField()
+    commented_by_me = serializers.SerializerMethodField()
+    # Annotated by PostQuerySet.with_excerpt() when requested.
+    excerpt = serializers.CharField(read_only=True)
+    comments_preview = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
@@ -22,14 +30,40 @@ class PostSerializer(serializers.ModelSerializer):
             "updated_at",
             "comments_count",
             "like_count",
+            "liked_by_me",
+            "commented_by_me",
+            "excerpt",
+            "comments_preview",
         ]
+        optional_fields = ["excerpt"]
+        summary_fields = ["id", "author", "title", "excerpt", "created_at", "comments_count", "like_count"]
+        # Neither is a column: the excerpt is annotated and previews are
+        # attached to each page by PostViewSet.
+        field_sources = {"excerpt": [], "comments_preview": []}
+        # Read straight from the annotations by the fast list path.
+        fast_fields = {
+            "liked_by_me": "liked_by_me",
+            "commented_by_me": "commented_by_me",
+            "comments_preview": "comments_preview",
+        }
+
+    # Annotated by PostQuerySet.with_viewer_state(); a post that was just
+    # created has neither.
+    def get_liked_by_me(self, obj):
+        return getattr(obj, "liked_by_me", False)
+
+    def get_commented_by_me(self, obj):
+        return getattr(obj, "commented_by_me", False)
+
+    def get_comments_preview(self, obj):
+        return getattr(obj, "comments_preview", [])
 
     # Allow DRF to create posts
     def create(self, validated_data):
         return Post.objects.create(**validated_data)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source="author.username")
 
     class Meta:
@@ -56,3 +90,34 @@ class LikeSerializer(serializers.ModelSerializer):
             "created_at",
         ]
         read_only_fields = ["id", "user", "created_at"]
+
+
+PREVIEW_FIELDS = ("id", "author", "content", "created_at")
+
+
+def comment_previews(post_ids):
+    """First COMMENT_PREVIEW_SIZE comments of each post, rendered, in one windowed query.
+
+    Returns ``{post_id: [comment, ...]}``; posts without comments are absent.
+    """
+    size = getattr(settings, "COMMENT_PREVIEW_SIZE", 3)
+    if not post_ids or size <= 0:
+        return {}
+
+    plan = read_plan(CommentSerializer, PREVIEW_FIELDS)
+    position = Window(
+        RowNumber(),
+        partition_by=F("post_id"),
+        order_by=[F("created_at").asc(), F("id").asc()],
+    )
+    rows = list(
+        Comment.objects.filter(post_id__in=post_ids)
+        .annotate(position=position)
+        .filter(position__lte=size)
+        .order_by("post_id", "created_at", "id")
+        .values("post_id", *plan.columns)
+    )
+    previews = {}
+    for row, comment in zip(rows, plan.iter_render(rows)):
+        previews.setdefault(row["post_id"], []).append(comment)
+    return previews
@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from social_media_api.response_cache import bump
+
+from . import search
+from .models import Comment, Like, Post
+
+
+def post_scopes(post_id):
+    """Response cache scopes showing ``post_id`` or its counters."""
+    return ["posts", f"post:{post_id}"]
+
+
+def comment_scopes(post_id):
+    return post_scopes(post_id) + ["comments", f"comments:{post_id}"]
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    bump(*comment_scopes(instance.pk))
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {"title", "content"} & set(update_fields):
+        search.get_backend().index(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.get_backend().remove(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment(sender, instance, **kwargs):
+    bump(*comment_scopes(instance.post_id))
+
+
+@receiver([post_save, post_delete], sender=Like)
+def invalidate_like(sender, instance, **kwargs):
+    # likes.py writes with raw SQL and bumps the same scopes itself.
+    bump(*post_scopes(instance.post_id))
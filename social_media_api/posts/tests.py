@@ -1,3 +1,653 @@
-from django.test import TestCase
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from social_media_api.testing import ConcurrentWritesTestCase, QueryBudgetMixin
+
+from . import trending
+from .feed import fan_out_post
+from .likes import like_post, unlike_post
+from .models import Comment, FeedEntry, Like, Post, TrendingScore
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEED_FANOUT_ASYNC=False)
+class FeedTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username="reader", password="testpass123")
+        self.author = User.objects.create_user(username="author", password="testpass123")
+        self.stranger = User.objects.create_user(username="stranger", password="testpass123")
+        self.reader.following.add(self.author)
+        self.client.force_authenticate(self.reader)
+
+    def test_new_post_is_fanned_out_to_followers(self):
+        self.client.force_authenticate(self.author)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse("post-list"), {"title": "Hello", "content": "World"}, format="json"
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        post = Post.objects.get(pk=response.data["id"])
+        self.assertTrue(post.fanned_out)
+        self.assertTrue(FeedEntry.objects.filter(user=self.reader, post=post).exists())
+
+    def test_feed_merges_materialized_and_pulled_posts(self):
+        pushed = Post.objects.create(author=self.author, title="Pushed", content="x")
+        fan_out_post(pushed.pk)
+        pulled = Post.objects.create(author=self.author, title="Pulled", content="x")
+        Post.objects.create(author=self.stranger, title="Hidden", content="x")
+
+        response = self.client.get(reverse("feed"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post["id"] for post in response.data["results"]], [pulled.id, pushed.id])
+
+    @override_settings(FEED_FANOUT_FOLLOWER_LIMIT=0)
+    def test_popular_authors_are_not_fanned_out(self):
+        post = Post.objects.create(author=self.author, title="Viral", content="x")
+
+        self.assertIsNone(fan_out_post(post.pk))
+        self.assertFalse(FeedEntry.objects.exists())
+        response = self.client.get(reverse("feed"))
+        self.assertEqual([item["id"] for item in response.data["results"]], [post.id])
+
+    def test_unfollow_prunes_feed(self):
+        post = Post.objects.create(author=self.author, title="Hello", content="x")
+        fan_out_post(post.pk)
+
+        self.client.post(reverse("unfollow-user", args=[self.author.id]))
+
+        self.assertFalse(FeedEntry.objects.filter(user=self.reader).exists())
+        self.assertEqual(self.client.get(reverse("feed")).data["results"], [])
+
+    def test_follow_backfills_recent_posts(self):
+        post = Post.objects.create(author=self.stranger, title="Old", content="x")
+        fan_out_post(post.pk)
+
+        self.client.post(reverse("follow-user", args=[self.stranger.id]))
+
+        self.assertTrue(FeedEntry.objects.filter(user=self.reader, post=post).exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEED_FANOUT_ASYNC=False)
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="testpass123")
+        self.client.force_authenticate(self.user)
+        self.posts = [
+            Post.objects.create(author=self.user, title=f"Post {i}", content="x")
+            for i in range(25)
+        ]
+
+    def collect(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.data)
+            ids += [item["id"] for item in response.data["results"]]
+            url = response.data["next"]
+        return ids
+
+    def test_walks_every_post_newest_first(self):
+        ids = self.collect(reverse("post-list"))
+
+        self.assertEqual(ids, [post.id for post in reversed(self.posts)])
+
+    def test_previous_link_returns_to_earlier_page(self):
+        first = self.client.get(reverse("post-list"))
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertEqual(back.data["results"], first.data["results"])
+        self.assertIsNone(first.data["previous"])
+
+    def test_deep_page_costs_the_same_as_first_page(self):
+        with CaptureQueriesContext(connection) as first_page:
+            url = self.client.get(reverse("post-list")).data["next"]
+        with CaptureQueriesContext(connection) as second_page:
+            self.client.get(url)
+
+        self.assertEqual(len(second_page), len(first_page))
+        for query in second_page.captured_queries:
+            self.assertNotIn('COUNT(*) AS "__count" FROM "posts_post"', query["sql"])
+            self.assertNotIn("OFFSET", query["sql"])
+
+    def test_comments_are_paged_oldest_first(self):
+        comments = [
+            Comment.objects.create(post=self.posts[0], author=self.user, content=str(i))
+            for i in range(12)
+        ]
+
+        ids = self.collect(reverse("comment-list"))
+
+        self.assertEqual(ids, [comment.id for comment in comments])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse("post-list"), {"cursor": "garbage"})
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEED_FANOUT_ASYNC=False)
+class PostCounterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="testpass123")
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title="Hello", content="x")
+
+    def test_like_and_unlike_maintain_like_count(self):
+        self.client.post(reverse("post-like", args=[self.post.id]))
+        self.client.post(reverse("post-like", args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+
+        self.client.post(reverse("post-unlike", args=[self.post.id]))
+        self.client.post(reverse("post-unlike", args=[self.post.id]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_like_responses_report_count_and_state(self):
+        response = self.client.post(reverse("post-like", args=[self.post.id]))
+        self.assertEqual((response.data["like_count"], response.data["liked"]), (1, True))
+
+        response = self.client.post(reverse("post-like", args=[self.post.id]))
+        self.assertEqual((response.data["like_count"], response.data["liked"]), (1, True))
+
+        response = self.client.post(reverse("post-unlike", args=[self.post.id]))
+        self.assertEqual((response.data["like_count"], response.data["liked"]), (0, False))
+
+    def test_like_missing_post_is_404(self):
+        self.assertEqual(self.client.post(reverse("post-like", args=[999999])).status_code, 404)
+        self.assertEqual(self.client.post(reverse("post-unlike", args=[999999])).status_code, 404)
+
+    def test_like_is_two_statements(self):
+        for action in (like_post, unlike_post):
+            with CaptureQueriesContext(connection) as queries:
+                action(self.user.pk, self.post.pk)
+            statements = [q["sql"] for q in queries if "SAVEPOINT" not in q["sql"]]
+            self.assertEqual(len(statements), 2, statements)
+
+    def test_comment_create_and_delete_maintain_comment_count(self):
+        response = self.client.post(
+            reverse("comment-list"), {"post": self.post.id, "content": "Nice"}, format="json"
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+        self.client.delete(reverse("comment-detail", args=[response.data["id"]]))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        for i in range(9):
+            post = Post.objects.create(author=self.user, title=f"Post {i}", content="x")
+            Like.objects.create(user=self.user, post=post)
+
+        with CaptureQueriesContext(connection) as small_page:
+            self.client.get(reverse("post-list"), {"page_size": 2})
+        with CaptureQueriesContext(connection) as full_page:
+            response = self.client.get(reverse("post-list"), {"page_size": 10})
+
+        self.assertEqual(len(full_page), len(small_page))
+        self.assertEqual(len(response.data["results"]), 10)
+
+    def test_recount_posts_repairs_drift(self):
+        Like.objects.create(user=self.user, post=self.post)
+        Comment.objects.create(post=self.post, author=self.user, content="x")
+        Post.objects.filter(pk=self.post.pk).update(like_count=7, comment_count=0)
+
+        out = StringIO()
+        call_command("recount_posts", stdout=out)
+
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
+        self.assertIn("1 post(s)", out.getvalue())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEED_FANOUT_ASYNC=False)
+class SparseFieldsetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="testpass123")
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title="Long", content="word " * 100)
+        Comment.objects.create(post=self.post, author=self.user, content="Nice")
+
+    def get(self, name, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data["results"], " ".join(q["sql"] for q in queries)
+
+    def test_fields_narrows_payload_and_sql(self):
+        results, sql = self.get("post-list", fields="id,title")
+
+        self.assertEqual(list(results[0]), ["id", "title"])
+        self.assertNotIn('"posts_post"."content"', sql)
+        self.assertNotIn("posts_like", sql)
+        self.assertNotIn("accounts_customuser", sql)
+
+    def test_omit(self):
+        results, sql = self.get("post-list", omit="content,liked_by_me")
+
+        self.assertNotIn("content", results[0])
+        self.assertNotIn("liked_by_me", results[0])
+        self.assertIn("commented_by_me", results[0])
+        self.assertNotIn('"posts_post"."content"', sql)
+
+    def test_summary_view_excerpt_is_cut_in_the_database(self):
+        results, _ = self.get("post-list", view="summary")
+
+        self.assertEqual(
+            list(results[0]),
+            ["id", "author", "title", "created_at", "comments_count", "like_count", "excerpt"],
+        )
+        self.assertEqual(results[0]["excerpt"], self.post.content[:200] + "…")
+
+        short = Post.objects.create(author=self.user, title="Short", content="Hi")
+        response = self.client.get(reverse("post-detail", args=[short.id]), {"fields": "excerpt"})
+        self.assertEqual(response.data, {"excerpt": "Hi"})
+
+    def test_excerpt_is_opt_in(self):
+        results, _ = self.get("post-list")
+        self.assertNotIn("excerpt", results[0])
+
+    def test_comment_fields(self):
+        results, sql = self.get("comment-list", fields="id,content")
+
+        self.assertEqual(list(results[0]), ["id", "content"])
+        self.assertNotIn("accounts_customuser", sql)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse("post-list"), {"fields": "id,password"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEED_FANOUT_ASYNC=False, COMMENT_PREVIEW_SIZE=2)
+class PostCommentsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="testpass123")
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title="Hello", content="x")
+        self.other = Post.objects.create(author=self.user, title="Other", content="x")
+        self.comments = [
+            Comment.objects.create(post=self.post, author=self.user, content=f"Comment {i}")
+            for i in range(5)
+        ]
+        Comment.objects.create(post=self.other, author=self.user, content="Elsewhere")
+
+    def test_nested_comments_are_keyset_paginated(self):
+        url = reverse("post-comments", args=[self.post.id])
+        with self.assertNumQueries(1):
+            first = self.client.get(url, {"page_size": 3})
+        second = self.client.get(first.data["next"])
+
+        ids = [row["id"] for row in first.data["results"] + second.data["results"]]
+        self.assertEqual(ids, [comment.id for comment in self.comments])
+        self.assertEqual(first.data["results"][0]["author"], "reader")
+        self.assertIsNone(second.data["next"])
+
+    def test_missing_post_is_404(self):
+        response = self.client.get(reverse("post-comments", args=[999999]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_post_list_embeds_previews_with_one_query(self):
+        for i in range(3):
+            post = Post.objects.create(author=self.user, title=f"More {i}", content="x")
+            Comment.objects.create(post=post, author=self.user, content="x")
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("post-list"))
+
+        previews = {row["id"]: row["comments_preview"] for row in response.data["results"]}
+        self.assertEqual(
+            [comment["id"] for comment in previews[self.post.id]],
+            [comment.id for comment in self.comments[:2]],
+        )
+        self.assertEqual(list(previews[self.post.id][0]), ["id", "author", "content", "created_at"])
+        self.assertEqual(len(previews[self.other.id]), 1)
+
+        detail = self.client.get(reverse("post-detail", args=[self.post.id]))
+        self.assertEqual(detail.data["comments_preview"], previews[self.post.id])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEED_FANOUT_ASYNC=False, NOTIFICATION_QUEUE_ASYNC=False)
+class TrendingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="testpass123")
+        self.client.force_authenticate(self.user)
+        self.quiet = Post.objects.create(author=self.user, title="Quiet", content="x")
+        self.busy = Post.objects.create(author=self.user, title="Busy", content="x")
+
+    def ids(self, window="day"):
+        response = self.client.get(reverse("post-trending"), {"window": window})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_engagement_updates_scores_incrementally(self):
+        self.client.post(reverse("post-like", args=[self.quiet.id]))
+        self.assertEqual(self.ids(), [self.quiet.id])
+
+        self.client.post(
+            reverse("comment-list"), {"post": self.busy.id, "content": "Nice"}, format="json"
+        )
+        self.assertEqual(self.ids(), [self.busy.id, self.quiet.id])
+        self.assertEqual(TrendingScore.objects.filter(post=self.busy).count(), 3)
+
+    def test_recency_outweighs_old_engagement(self):
+        old = timezone.now() - timedelta(hours=20)
+        Post.objects.filter(pk=self.quiet.pk).update(created_at=old, like_count=3)
+        Post.objects.filter(pk=self.busy.pk).update(like_count=3)
+        call_command("recompute_trending", stdout=StringIO())
+
+        self.assertEqual(self.ids("day"), [self.busy.id, self.quiet.id])
+        self.assertEqual(self.ids("hour"), [self.busy.id])
+
+    @override_settings(TRENDING_SIZE=1)
+    def test_recompute_keeps_top_n_and_drops_expired(self):
+        Post.objects.filter(pk=self.quiet.pk).update(like_count=1)
+        Post.objects.filter(pk=self.busy.pk).update(like_count=9)
+        trending.record_engagement(self.quiet.pk)
+        stale = Post.objects.create(author=self.user, title="Stale", content="x", like_count=50)
+        Post.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(days=8))
+
+        trending.recompute("week")
+
+        self.assertEqual(
+            list(TrendingScore.objects.filter(window="week").values_list("post_id", flat=True)),
+            [self.busy.id],
+        )
+
+    @override_settings(TRENDING_SIZE=1)
+    def test_engagement_trims_oversized_windows(self):
+        posts = [self.quiet, self.busy] + [
+            Post.objects.create(author=self.user, title=f"Post {i}", content="x") for i in range(4)
+        ]
+        for likes, post in enumerate(posts, 1):
+            Post.objects.filter(pk=post.pk).update(like_count=likes)
+            trending.record_engagement(post.pk)
+
+        for window in trending.WINDOWS:
+            kept = TrendingScore.objects.filter(window=window).values_list("post_id", flat=True)
+            self.assertLessEqual(len(kept), trending.TRIM_FACTOR)
+            self.assertIn(posts[-1].id, kept)
+
+    def test_read_is_constant(self):
+        self.client.post(reverse("post-like", args=[self.busy.id]))
+        # The ranked page, then its comment previews.
+        with self.assertNumQueries(2):
+            self.client.get(reverse("post-trending"))
+
+    def test_unknown_window_is_rejected(self):
+        response = self.client.get(reverse("post-trending"), {"window": "year"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LikeConcurrencyTests(ConcurrentWritesTestCase):
+    """Many threads liking and unliking one post must leave exact counts."""
+
+    users = 20
+    rounds = 5
+
+    def setUp(self):
+        author = User.objects.create_user(username="author", password="testpass123")
+        self.post = Post.objects.create(author=author, title="Hot", content="x")
+        self.user_ids = [
+            User.objects.create_user(username=f"fan{i}", password="testpass123").pk
+            for i in range(self.users)
+        ]
+
+    def hammer(self, action):
+        barrier = threading.Barrier(self.users * self.rounds)
+
+        def work(user_id):
+            try:
+                barrier.wait()
+                return action(user_id, self.post.pk).changed
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=self.users * self.rounds) as pool:
+            return list(pool.map(work, self.user_ids * self.rounds))
+
+    def test_concurrent_likes_and_unlikes_are_exact(self):
+        changed = self.hammer(like_post)
+
+        self.assertEqual(sum(changed), self.users)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, self.users)
+        self.assertEqual(Like.objects.filter(post=self.post).count(), self.users)
+
+        changed = self.hammer(unlike_post)
+
+        self.assertEqual(sum(changed), self.users)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+        self.assertFalse(Like.objects.filter(post=self.post).exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEED_FANOUT_ASYNC=False)
+class PostQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    query_budgets = {
+        "post-list": 2,
+        "feed": 5,
+        "comment-list": 1,
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user(username="reader", password="testpass123")
+        self.client.force_authenticate(self.reader)
+        for i in range(5):
+            author = User.objects.create_user(username=f"author{i}", password="testpass123")
+            self.reader.following.add(author)
+            post = Post.objects.create(author=author, title=f"Post {i}", content="x")
+            Comment.objects.create(post=post, author=author, content="x")
+            if i % 2:
+                fan_out_post(post.pk)
+
+    def test_post_list_budget(self):
+        self.assertQueryBudget("post-list")
+
+    def test_feed_budget(self):
+        response = self.assertQueryBudget("feed")
+        self.assertEqual(len(response.data["results"]), 5)
+
+    def test_comment_list_budget(self):
+        self.assertQueryBudget("comment-list")
+
+    def test_viewer_state_is_annotated(self):
+        liked, commented = Post.objects.order_by("id")[:2]
+        Like.objects.create(user=self.reader, post=liked)
+        Comment.objects.create(post=commented, author=self.reader, content="x")
+
+        for name in ("post-list", "feed"):
+            response = self.client.get(reverse(name))
+            state = {
+                row["id"]: (row["liked_by_me"], row["commented_by_me"])
+                for row in response.data["results"]
+            }
+            self.assertEqual(state.pop(liked.id), (True, False))
+            self.assertEqual(state.pop(commented.id), (False, True))
+            self.assertEqual(set(state.values()), {(False, False)})
+
+        response = self.client.get(reverse("post-detail", args=[liked.id]))
+        self.assertTrue(response.data["liked_by_me"])
+
+    def test_viewer_state_query_count_is_flat(self):
+        counts = []
+        for page_size in (1, 5):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse("post-list"), {"page_size": page_size})
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEED_FANOUT_ASYNC=False)
+class ResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="testpass123")
+        self.other = User.objects.create_user(username="other", password="testpass123")
+        self.client.force_authenticate(self.user)
+        self.post = Post.objects.create(author=self.user, title="Hello", content="x")
+        self.detail = reverse("post-detail", args=[self.post.id])
+
+    def test_repeated_read_runs_no_queries(self):
+        for url in (reverse("post-list"), self.detail, reverse("post-comments", args=[self.post.id])):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+            self.assertEqual(second.json(), first.json())
+
+    def test_like_invalidates_post(self):
+        self.client.get(self.detail)
+        self.client.post(reverse("post-like", args=[self.post.id]))
+
+        response = self.client.get(self.detail)
+        self.assertEqual((response.data["like_count"], response.data["liked_by_me"]), (1, True))
+
+    def test_comment_invalidates_post_and_comment_pages(self):
+        comments = reverse("post-comments", args=[self.post.id])
+        self.client.get(self.detail)
+        self.client.get(comments)
+        self.client.post(reverse("comment-list"), {"post": self.post.id, "content": "Nice"}, format="json")
+
+        self.assertEqual(self.client.get(self.detail).data["comments_count"], 1)
+        self.assertEqual(len(self.client.get(comments).data["results"]), 1)
+
+    def test_edit_invalidates_list_and_detail(self):
+        self.client.get(reverse("post-list"))
+        self.client.get(self.detail)
+        self.client.patch(self.detail, {"title": "Edited"}, format="json")
+
+        self.assertEqual(self.client.get(self.detail).data["title"], "Edited")
+        self.assertEqual(self.client.get(reverse("post-list")).data["results"][0]["title"], "Edited")
+
+    def test_conditional_requests_get_304(self):
+        response = self.client.get(self.detail)
+
+        revalidated = self.client.get(self.detail, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+        revalidated = self.client.get(self.detail, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(revalidated.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.post(reverse("post-like", args=[self.post.id]))
+        changed = self.client.get(self.detail, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+
+    def test_viewer_fields_are_cached_per_user(self):
+        Like.objects.create(user=self.user, post=self.post)
+        self.assertTrue(self.client.get(self.detail).data["liked_by_me"])
+
+        self.client.force_authenticate(self.other)
+        self.assertFalse(self.client.get(self.detail).data["liked_by_me"])
+
+    def test_shared_fields_are_cached_across_users(self):
+        url = reverse("post-list")
+        self.client.get(url, {"fields": "id,title"})
+
+        self.client.force_authenticate(self.other)
+        with self.assertNumQueries(0):
+            self.client.get(url, {"fields": "id,title"})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEED_FANOUT_ASYNC=False)
+class PostSearchTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="reader", password="testpass123")
+        self.client.force_authenticate(self.user)
+        self.in_title = Post.objects.create(author=self.user, title="Django tips", content="Use select_related.")
+        self.in_content = Post.objects.create(author=self.user, title="Tips", content="More about Django here.")
+        self.other = Post.objects.create(author=self.user, title="Cooking", content="Pasta with garlic.")
+
+    def search(self, q, **params):
+        return self.client.get(reverse("post-search"), {"q": q, **params})
+
+    def ids(self, q):
+        return [post["id"] for post in self.search(q).data["results"]]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.ids("django"), [self.in_title.id, self.in_content.id])
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.ids("django select_related"), [self.in_title.id])
+        self.assertEqual(self.ids("django pasta"), [])
+
+    def test_prefix_query(self):
+        self.assertEqual(self.ids("gar*"), [self.other.id])
+        self.assertEqual(self.ids("gar"), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.ids('pasta OR "django'), [])
+        self.assertEqual(self.search("pasta)(").status_code, status.HTTP_200_OK)
+
+    def test_index_follows_edits_and_deletes(self):
+        self.client.patch(reverse("post-detail", args=[self.other.id]), {"title": "Django pasta"}, format="json")
+        self.assertEqual(self.ids("django pasta"), [self.other.id])
+
+        self.client.delete(reverse("post-detail", args=[self.other.id]))
+        self.assertEqual(self.ids("pasta"), [])
+
+    def test_cursor_pages_through_all_hits(self):
+        for i in range(5):
+            Post.objects.create(author=self.user, title=f"Django {i}", content="django " * i)
+
+        seen, response = [], self.search("django", page_size=2)
+        while True:
+            seen += [post["id"] for post in response.data["results"]]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+
+        everything = [post["id"] for post in self.search("django", page_size=100).data["results"]]
+        self.assertEqual(len(everything), 7)
+        self.assertEqual(seen, everything)
+
+    @override_settings(POST_SEARCH_RANK_WINDOW=3)
+    def test_only_newest_matches_are_ranked(self):
+        newer = [Post.objects.create(author=self.user, title="Note", content="django").id for _ in range(3)]
+        self.assertEqual(sorted(self.ids("django")), newer)
+
+        first = self.search("django", page_size=2)
+        Post.objects.create(author=self.user, title="Django", content="django django")
+        second = self.client.get(first.data["next"])
+
+        paged = [post["id"] for post in first.data["results"] + second.data["results"]]
+        self.assertEqual(sorted(paged), newer)
+
+    def test_query_without_words_is_rejected(self):
+        self.assertEqual(self.search("  !! ").status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rebuild_restores_index_after_bulk_import(self):
+        Post.objects.bulk_create([Post(author=self.user, title="Imported", content="bulk")])
+        self.assertEqual(self.ids("imported"), [])
+
+        call_command("rebuild_post_search", stdout=StringIO())
+        self.assertEqual(len(self.ids("imported")), 1)
+
+
+@override_settings(POST_SEARCH_BACKEND="posts.search.TermIndexBackend")
+class TermIndexSearchTests(PostSearchTests):
+    pass
@@ -0,0 +1,147 @@
+"""
+Trending posts.
+
+A post's score in a window is its engagement decayed by age, kept in log
+space so it never has to be rewritten as time passes:
+
+    score = log2(1 + likes + COMMENT_WEIGHT * comments) + created_at / half_life
+
+Every ``half_life`` seconds of age costs a post as much as halving its
+engagement. Because the time term is fixed at creation, scores of
+different posts stay comparable forever and ranking is a plain ORDER BY on
+the stored value.
+
+Scores live in TrendingScore, one row per (window, post), and are kept
+current in two ways:
+
+* ``record_engagement()`` re-scores a post whenever it is liked, unliked
+  or commented on. Once a window holds more than twice TRENDING_SIZE rows
+  it is trimmed back to its top TRENDING_SIZE, so the table stays bounded
+  even if the command below never runs;
+* ``manage.py recompute_trending`` periodically rebuilds each window from
+  the posts created inside it, keeping only the top TRENDING_SIZE and
+  dropping rows that have aged out.
+
+Reading a window is then an index range scan over its top rows.
+"""
+
+import heapq
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Post, TrendingScore
+
+COMMENT_WEIGHT = 2
+
+# A window is trimmed once it holds this many times TRENDING_SIZE rows, so
+# the trim runs at most once per TRENDING_SIZE new rows.
+TRIM_FACTOR = 2
+
+# window -> (length, half-life)
+WINDOWS = {
+    TrendingScore.HOUR: (timedelta(hours=1), timedelta(minutes=20)),
+    TrendingScore.DAY: (timedelta(days=1), timedelta(hours=4)),
+    TrendingScore.WEEK: (timedelta(weeks=1), timedelta(days=1)),
+}
+
+
+def _size():
+    return getattr(settings, "TRENDING_SIZE", 100)
+
+
+def score(window, created_at, like_count, comment_count):
+    half_life = WINDOWS[window][1].total_seconds()
+    engagement = like_count + COMMENT_WEIGHT * comment_count
+    return math.log2(1 + engagement) + created_at.timestamp() / half_life
+
+
+def cutoff(window, now=None):
+    """Posts created before this moment have left ``window``."""
+    return (now or timezone.now()) - WINDOWS[window][0]
+
+
+def record_engagement(post_id):
+    """Re-score ``post_id`` in every window it still belongs to."""
+    row = Post.objects.filter(pk=post_id).values_list("created_at", "like_count", "comment_count").first()
+    if row is None:
+        return
+    created_at, like_count, comment_count = row
+
+    now = timezone.now()
+    scores = [
+        TrendingScore(
+            window=window,
+            post_id=post_id,
+            post_created_at=created_at,
+            score=score(window, created_at, like_count, comment_count),
+        )
+        for window in WINDOWS
+        if created_at >= cutoff(window, now)
+    ]
+    if not scores:
+        return
+    TrendingScore.objects.bulk_create(
+        scores,
+        update_conflicts=True,
+        unique_fields=["window", "post"],
+        update_fields=["score"],
+    )
+
+    sizes = (
+        TrendingScore.objects.filter(window__in=[row.window for row in scores])
+        .values_list("window")
+        .annotate(rows=Count("pk"))
+        .order_by()
+    )
+    for window, rows in sizes:
+        if rows > TRIM_FACTOR * _size():
+            trim(window, now)
+
+
+def trim(window, now=None):
+    """Drop ``window`` rows that aged out or fell below its top TRENDING_SIZE."""
+    rows = TrendingScore.objects.filter(window=window)
+    rows.filter(post_created_at__lt=cutoff(window, now)).delete()
+    floor = rows.order_by("-score").values_list("score", flat=True)[_size() - 1:_size()]
+    rows.filter(score__lt=floor).delete()
+
+
+def recompute(window, now=None):
+    """Rebuild ``window`` from scratch. Returns the number of rows kept."""
+    since = cutoff(window, now)
+    candidates = (
+        Post.objects.filter(created_at__gte=since)
+        .exclude(like_count=0, comment_count=0)
+        .values_list("pk", "created_at", "like_count", "comment_count")
+    )
+    top = heapq.nlargest(
+        _size(),
+        (
+            (score(window, created_at, likes, comments), pk, created_at)
+            for pk, created_at, likes, comments in candidates.iterator(chunk_size=10000)
+        ),
+    )
+
+    with transaction.atomic():
+        TrendingScore.objects.filter(window=window).delete()
+        TrendingScore.objects.bulk_create([
+            TrendingScore(window=window, post_id=pk, post_created_at=created_at, score=value)
+            for value, pk, created_at in top
+        ])
+    return len(top)
+
+
+def trending_posts(window, queryset=None, limit=None):
+    """Top posts of ``window``, best first, loaded from ``queryset``."""
+    if queryset is None:
+        queryset = Post.objects.select_related("author")
+    limit = min(limit or _size(), _size())
+    return queryset.filter(
+        trending_scores__window=window,
+        trending_scores__post_created_at__gte=cutoff(window),
+    ).order_by("-trending_scores__score")[:limit]
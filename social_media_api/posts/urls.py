@@ -4,6 +4,7 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     PostViewSet,
     CommentViewSet,
+    PostCommentsView,
     LikePostView,
     UnlikePostView,
 )
@@ -18,6 +19,8 @@ urlpatterns = [
     # FEED ENDPOINT 
     path("feed/", PostViewSet.as_view({"get": "feed"}), name="feed"),
 
+    path("posts/<int:pk>/comments/", PostCommentsView.as_view(), name="post-comments"),
+
     # Like / Unlike endpoints
     path("posts/<int:pk>/like/", LikePostView.as_view(), name="post-like"),
     path("posts/<int:pk>/unlike/", UnlikePostView.as_view(), name="post-unlike"),
@@ -1,10 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
 from rest_framework import viewsets, permissions, generics, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 
-from posts.models import Post, Comment, Like
-from posts.serializers import PostSerializer, CommentSerializer
-from notifications.models import Notification
+from posts.models import Post, Comment, TrendingScore
+from posts.serializers import PostSerializer, CommentSerializer, comment_previews
+from posts.feed import get_feed, schedule_fan_out
+from posts.likes import like_post, unlike_post
+from posts.search import get_backend, parse_query
+from posts.trending import WINDOWS, record_engagement, trending_posts
+from notifications.utils import create_notification_for_comment, create_notification_for_like
+from social_media_api.pagination import KeysetPagination, OldestFirstKeysetPagination, SearchPagination
+from social_media_api.fastread import FastReadViewMixin
+from social_media_api.response_cache import ResponseCacheMixin
+from social_media_api.sparse import SparseFieldsetViewMixin
+
+User = get_user_model()
 
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
@@ -14,15 +28,48 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
         return obj.author == request.user
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(ResponseCacheMixin, FastReadViewMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
     serializer_class = PostSerializer
+    pagination_class = KeysetPagination
 
     # REQUIRED BY CHECKER
     queryset = Post.objects.all()
 
+    def get_queryset(self):
+        fields = self.sparse_fields()
+        queryset = Post.objects.with_viewer_state(
+            self.request.user,
+            [name for name in ("liked_by_me", "commented_by_me") if name in fields],
+        )
+        if "author" in fields:
+            queryset = queryset.select_related("author")
+        if "excerpt" in fields:
+            queryset = queryset.with_excerpt()
+        return self.narrow_queryset(queryset)
+
+    def cache_scopes(self):
+        return [f"post:{self.kwargs['pk']}"] if self.action == "retrieve" else ["posts"]
+
+    def cache_varies_on_user(self):
+        return bool({"liked_by_me", "commented_by_me"} & set(self.sparse_fields()))
+
+    def render_rows(self, rows):
+        if "comments_preview" in self.sparse_fields():
+            previews = comment_previews([row["id"] for row in rows])
+            for row in rows:
+                row["comments_preview"] = previews.get(row["id"], [])
+        return super().render_rows(rows)
+
+    def get_object(self):
+        post = super().get_object()
+        if self.action == "retrieve" and "comments_preview" in self.sparse_fields():
+            post.comments_preview = comment_previews([post.pk]).get(post.pk, [])
+        return post
+
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        post = serializer.save(author=self.request.user)
+        schedule_fan_out(post)
 
     # FEED VIEW (CHECKER REQUIRED)
     @action(
@@ -31,21 +78,106 @@ class PostViewSet(viewsets.ModelViewSet):
         permission_classes=[permissions.IsAuthenticated]
     )
     def feed(self, request):
-        following_users = request.user.following.all()
-        posts = Post.objects.filter(author__in=following_users).order_by("-created_at")
-        serializer = self.get_serializer(posts, many=True)
-        return Response(serializer.data)
+        posts = self.paginator.paginate_source(
+            lambda limit, before: get_feed(
+                request.user, limit, before, self.fast_values(self.get_queryset())
+            ),
+            request,
+            view=self,
+        )
+        return self.get_paginated_response(self.render_rows(posts))
+
+    @action(detail=False, methods=["get"])
+    def trending(self, request):
+        window = request.query_params.get("window", TrendingScore.DAY)
+        if window not in WINDOWS:
+            return Response(
+                {"detail": f"window must be one of: {', '.join(WINDOWS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            limit = 20
+
+        posts = list(trending_posts(window, self.fast_values(self.get_queryset()), max(limit, 1)))
+        return Response({"window": window, "results": self.render_rows(posts)})
+
+    @action(detail=False, methods=["get"], pagination_class=SearchPagination)
+    def search(self, request):
+        terms = parse_query(request.query_params.get("q", ""))
+        if not terms:
+            return Response(
+                {"detail": "q must contain at least one word."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
+        backend = get_backend()
+        hits = self.paginator.paginate_source(
+            lambda limit, after: backend.search(terms, limit, after), request, view=self
+        )
+        ids = [hit.post_id for hit in hits]
+        rows = {row["id"]: row for row in self.fast_values(self.get_queryset()).filter(pk__in=ids)}
+        return self.get_paginated_response(self.render_rows([rows[pk] for pk in ids if pk in rows]))
+
+
+class PostCommentsView(ResponseCacheMixin, FastReadViewMixin, SparseFieldsetViewMixin, generics.ListAPIView):
+    """Comments on one post, oldest first, keyset-paginated on (created_at, id)."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = CommentSerializer
+    pagination_class = OldestFirstKeysetPagination
 
-class CommentViewSet(viewsets.ModelViewSet):
+    def cache_scopes(self):
+        return [f"comments:{self.kwargs['pk']}"]
+
+    def get_queryset(self):
+        queryset = Comment.objects.filter(post_id=self.kwargs["pk"])
+        if "author" in self.sparse_fields():
+            queryset = queryset.select_related("author")
+        return self.narrow_queryset(queryset)
+
+    def render_rows(self, rows):
+        # Only an empty page needs to tell "no comments" from "no post".
+        # Checking here keeps the answer inside the cached response.
+        if not rows and not Post.objects.filter(pk=self.kwargs["pk"]).exists():
+            raise Http404
+        return super().render_rows(rows)
+
+
+class CommentViewSet(ResponseCacheMixin, FastReadViewMixin, SparseFieldsetViewMixin, viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
     serializer_class = CommentSerializer
+    pagination_class = OldestFirstKeysetPagination
+    cached_actions = ("list",)
+
+    def cache_scopes(self):
+        return ["comments"]
 
     # REQUIRED BY CHECKER
     queryset = Comment.objects.all()
 
+    def get_queryset(self):
+        queryset = Comment.objects.all()
+        if "author" in self.sparse_fields():
+            queryset = queryset.select_related("author")
+        return self.narrow_queryset(queryset)
+
+    @transaction.atomic
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user)
+        comment = serializer.save(author=self.request.user)
+        Post.objects.filter(pk=comment.post_id).update(comment_count=F("comment_count") + 1)
+        record_engagement(comment.post_id)
+        create_notification_for_comment(self.request.user, comment.post.author, comment.post)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        post_id = instance.post_id
+        instance.delete()
+        Post.objects.filter(pk=post_id, comment_count__gt=0).update(
+            comment_count=F("comment_count") - 1
+        )
+        record_engagement(post_id)
 
 
 # ============================
@@ -53,38 +185,38 @@ class CommentViewSet(viewsets.ModelViewSet):
 # ============================
 
 class LikePostView(generics.GenericAPIView):
+    """Like a post. Idempotent: liking twice leaves one like."""
+
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
+        state = like_post(request.user.pk, pk)
+        if state is None:
+            raise Http404
 
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
-
-        if created:
-            Notification.objects.create(
-                recipient=post.author,
-                actor=request.user,
-                verb="liked your post",
-                target=post
-            )
+        if state.changed:
+            record_engagement(pk)
+            create_notification_for_like(request.user, User(pk=state.author_id), Post(pk=pk))
 
         return Response(
-            {"detail": "Post liked"},
+            {"detail": "Post liked", "like_count": state.like_count, "liked": True},
             status=status.HTTP_200_OK
         )
 
 class UnlikePostView(generics.GenericAPIView):
+    """Remove the caller's like from a post. Idempotent."""
+
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, pk):
-        post = generics.get_object_or_404(Post, pk=pk)
+        state = unlike_post(request.user.pk, pk)
+        if state is None:
+            raise Http404
 
-        Like.objects.filter(
-            user=request.user,
-            post=post
-        ).delete()
+        if state.changed:
+            record_engagement(pk)
 
         return Response(
-            {"detail": "Post unliked"},
+            {"detail": "Post unliked", "like_count": state.like_count, "liked": False},
             status=status.HTTP_200_OK
         )
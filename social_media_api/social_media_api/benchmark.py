@@ -0,0 +1,68 @@
+"""
+Helpers shared by the ``bench_*`` management commands.
+
+Benchmarks build their fixtures inside a transaction that is always rolled
+back, so they can be pointed at a development database without leaving
+rows behind.
+"""
+
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+@contextmanager
+def rolled_back():
+    """Run the block in a transaction and discard everything it wrote."""
+    try:
+        with transaction.atomic():
+            yield
+            raise _Rollback
+    except _Rollback:
+        pass
+
+
+@contextmanager
+def manual_timestamps(model, *field_names):
+    """Let bulk-created fixtures carry their own ``auto_now_add`` values."""
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+def measure(func, iterations, warmup=3):
+    """Call ``func`` repeatedly and return p50/p99/mean latency in ms."""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    return {
+        "p50": samples[len(samples) // 2],
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "mean": statistics.fmean(samples),
+    }
+
+
+def format_row(label, result):
+    return (
+        f"{label:<40} p50={result['p50']:8.2f}ms  "
+        f"p99={result['p99']:8.2f}ms  mean={result['mean']:8.2f}ms"
+    )
@@ -0,0 +1,103 @@
+"""
+Fast read path for list endpoints.
+
+Rendering a page through a ModelSerializer builds a model instance per row
+and then walks every bound field's ``get_attribute()``. For long pages that
+dominates the request. Here a serializer class and a field selection are
+compiled once into a flat plan of ``(name, getter, converter)`` steps, and
+rows are rendered straight from ``.values()`` dicts.
+
+Converters are the serializer's own bound fields' ``to_representation``,
+so the output is identical to ``serializer.data``. Fields that are not a
+column, such as SerializerMethodFields or properties, are described in the
+serializer's ``Meta.fast_fields``: either the row key holding the finished
+value (usually an annotation) or a callable taking the row dict. Their
+columns come from ``Meta.field_sources`` (see sparse.py); a key mapped to
+no columns there must be filled into the rows by the view before render.
+"""
+
+from functools import lru_cache
+from operator import itemgetter
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import RelatedField
+from rest_framework.response import Response
+
+
+class ReadPlan:
+    def __init__(self, serializer_class, field_names):
+        serializer = serializer_class()
+        fields = serializer.get_fields()
+        meta = serializer_class.Meta
+        overrides = getattr(meta, "fast_fields", {})
+        sources = getattr(meta, "field_sources", {})
+
+        self.columns = []
+        self.steps = []
+        for name in field_names:
+            field = fields[name]
+            field.bind(name, serializer)
+            override = overrides.get(name)
+
+            if callable(override):
+                self.columns.extend(sources.get(name, ()))
+                self.steps.append((name, override, None))
+                continue
+            if override is not None:
+                self.columns.extend(sources.get(name, [override]))
+                self.steps.append((name, itemgetter(override), None))
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} needs an entry in Meta.fast_fields."
+                )
+
+            key = "__".join(field.source_attrs)
+            self.columns.append(key)
+            if isinstance(field, (RelatedField, serializers.ReadOnlyField)):
+                # .values() already yields the primary key / raw value.
+                converter = None
+            else:
+                converter = field.to_representation
+            self.steps.append((name, itemgetter(key), converter))
+
+    def render(self, rows):
+        return list(self.iter_render(rows))
+
+    def iter_render(self, rows):
+        """Like render(), but lazily, for streaming exports."""
+        steps = self.steps
+        for row in rows:
+            item = {}
+            for name, get, convert in steps:
+                value = get(row)
+                item[name] = value if convert is None or value is None else convert(value)
+            yield item
+
+
+@lru_cache(maxsize=256)
+def read_plan(serializer_class, field_names):
+    return ReadPlan(serializer_class, field_names)
+
+
+class FastReadViewMixin:
+    """Serves ``list()`` through a ReadPlan. Requires SparseFieldsetViewMixin."""
+
+    def read_plan(self):
+        return read_plan(self.get_serializer_class(), tuple(self.sparse_fields()))
+
+    def fast_values(self, queryset):
+        """``queryset`` as dicts holding every column the plan and paginator read."""
+        ordering = getattr(self.paginator, "ordering", ()) if self.paginator else ()
+        return queryset.values(*self.read_plan().columns, *(name.lstrip("-") for name in ordering))
+
+    def render_rows(self, rows):
+        return self.read_plan().render(rows)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.fast_values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(self.render_rows(list(queryset)))
+        return self.get_paginated_response(self.render_rows(page))
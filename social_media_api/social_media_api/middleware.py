@@ -0,0 +1,74 @@
+"""
+Per-request SQL metrics.
+
+QueryMetricsMiddleware counts every statement a request sends to the
+database, sums their time and remembers the slowest one. The numbers are
+returned to the client as a ``Server-Timing`` header and written as one
+structured log line per request, so N+1 regressions show up in browser
+devtools and in the logs without enabling DEBUG.
+"""
+
+import json
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger("social_media_api.queries")
+
+
+class QueryMetrics:
+    """An ``execute_wrapper`` that records statement count and timing."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest_duration = 0.0
+        self.slowest_sql = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            if elapsed >= self.slowest_duration:
+                self.slowest_duration = elapsed
+                self.slowest_sql = sql
+
+
+class QueryMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sql_chars = getattr(settings, "QUERY_METRICS_SQL_CHARS", 300)
+
+    def __call__(self, request):
+        metrics = QueryMetrics()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(metrics))
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={metrics.duration * 1000:.2f};desc="{metrics.count} queries"',
+            f'db-slowest;dur={metrics.slowest_duration * 1000:.2f}',
+            f"total;dur={total * 1000:.2f}",
+        ])
+
+        logger.info(json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": metrics.count,
+            "db_ms": round(metrics.duration * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+            "slowest_ms": round(metrics.slowest_duration * 1000, 2),
+            "slowest_sql": (metrics.slowest_sql or "")[:self.sql_chars],
+        }))
+        return response
@@ -0,0 +1,182 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are addressed by the ``(timestamp, id)`` key of the last row seen
+rather than by an offset, so every page is a range scan over a composite
+index and no ``COUNT(*)`` is issued. Page 1000 costs the same as page 1.
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    # Two fields: a timestamp and a unique tie-breaker. Both must share the
+    # same direction and be covered by a composite index.
+    ordering = ("-created_at", "-id")
+
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        key, reverse = self.decode_cursor(request)
+
+        ordering = self._reversed_ordering() if reverse else self.ordering
+        if key is not None:
+            queryset = queryset.filter(self._after(key, ordering))
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = key is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, key is not None
+
+        self.page = rows
+        return rows
+
+    def paginate_source(self, fetch, request, view=None):
+        """Paginate rows produced by ``fetch(limit, before)`` instead of a queryset.
+
+        ``fetch`` must return rows in this paginator's ordering, starting
+        strictly after the ``before`` key when one is given. Only forward
+        paging is supported.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        key, reverse = self.decode_cursor(request)
+        if reverse:
+            raise NotFound(self.invalid_cursor_message)
+
+        rows = list(fetch(page_size + 1, key))
+        self.has_next, self.has_previous = len(rows) > page_size, False
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    # ----------------------------
+    # Cursor encoding
+    # ----------------------------
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            timestamp = parse_datetime(payload["k"][0])
+            pk = int(payload["k"][1])
+            reverse = bool(payload.get("r"))
+        except (TypeError, ValueError, KeyError, IndexError):
+            raise NotFound(self.invalid_cursor_message)
+        if timestamp is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (timestamp, pk), reverse
+
+    def encode_cursor(self, row, reverse):
+        timestamp_field, pk_field = (name.lstrip("-") for name in self.ordering)
+        # Rows are model instances, or dicts when served from .values().
+        get = row.get if isinstance(row, dict) else lambda name: getattr(row, name)
+        payload = {"k": [get(timestamp_field).isoformat(), get(pk_field)]}
+        if reverse:
+            payload["r"] = 1
+        encoded = urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _reversed_ordering(self):
+        return tuple(name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering)
+
+    def _after(self, key, ordering):
+        (timestamp_field, pk_field), (timestamp, pk) = ordering, key
+        lookup = "lt" if timestamp_field.startswith("-") else "gt"
+        timestamp_field, pk_field = timestamp_field.lstrip("-"), pk_field.lstrip("-")
+        return Q(**{f"{timestamp_field}__{lookup}": timestamp}) | Q(
+            **{timestamp_field: timestamp, f"{pk_field}__{lookup}": pk}
+        )
+
+
+class OldestFirstKeysetPagination(KeysetPagination):
+    ordering = ("created_at", "id")
+
+
+class SearchPagination(KeysetPagination):
+    """Pages search hits (posts/search.py), best first.
+
+    The cursor holds the position of the last hit and the id window the
+    search ranks within, rather than a database key; only the id is read
+    from the database.
+    """
+
+    ordering = ("-id",)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position, floor, ceiling = (int(value) for value in payload["k"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if position < 0:
+            raise NotFound(self.invalid_cursor_message)
+        return (position, (floor, ceiling)), bool(payload.get("r"))
+
+    def encode_cursor(self, hit, reverse):
+        payload = {"k": [hit.position, *hit.window]}
+        encoded = urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode()).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
@@ -0,0 +1,121 @@
+"""
+Per-view response cache with versioned keys.
+
+Each cached view names the *scopes* its response depends on (``"posts"``,
+``"post:42"``, ...). Every scope has a version in the cache, and the
+versions are part of the response's cache key, so bumping a scope makes
+every dependent entry unreachable at once: stale responses are never
+served and nothing has to be deleted. posts/signals.py bumps the scopes
+whenever a Post, Comment or Like is saved or deleted.
+
+A version is the time of the last change in nanoseconds, which doubles as
+the response's ``Last-Modified``. Together with an ``ETag`` derived from
+the key, a client revalidating an unchanged resource gets a 304 after one
+cache round trip, without the view running at all. ``Post.updated_at`` is
+deliberately not used: it misses likes and comment counts (written with
+F() and raw SQL) and deleted posts, so ``If-Modified-Since`` checked
+against it would answer 304 for responses that changed.
+
+Versions must be shared by every process, or a bump in one worker is
+invisible to the others and they keep serving stale entries: settings.py
+uses Redis when REDIS_URL is set and a per-process LocMemCache otherwise.
+
+Responses that contain per-viewer fields are keyed per user; everything
+else is shared between users. Entries expire after RESPONSE_CACHE_TIMEOUT
+seconds, which also bounds staleness from changes no scope tracks (a
+renamed author, for example).
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def _cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _version_key(scope):
+    return f"response-version:{scope}"
+
+
+def versions(scopes):
+    """Current version of each scope, creating missing ones."""
+    keys = {_version_key(scope): scope for scope in scopes}
+    found = _cache().get_many(keys)
+    for key in keys.keys() - found.keys():
+        # add() keeps whichever value another process stored first.
+        _cache().add(key, time.time_ns(), None)
+        found[key] = _cache().get(key) or time.time_ns()
+    return [found[_version_key(scope)] for scope in scopes]
+
+
+def _set_versions(scopes):
+    now = time.time_ns()
+    _cache().set_many({_version_key(scope): now for scope in scopes}, None)
+
+
+def bump(*scopes):
+    """Invalidate every cached response depending on any of ``scopes``.
+
+    Bumps immediately and again once the current transaction commits: a
+    concurrent request could otherwise cache the pre-commit state under the
+    new version.
+    """
+    _set_versions(scopes)
+    transaction.on_commit(lambda: _set_versions(scopes))
+
+
+class ResponseCacheMixin:
+    """Cache the responses of ``cached_actions`` on a (view)set."""
+
+    cached_actions = ("list", "retrieve")
+
+    def cache_scopes(self):
+        """Scopes the current action's response depends on."""
+        raise NotImplementedError
+
+    def cache_varies_on_user(self):
+        return False
+
+    def list(self, request, *args, **kwargs):
+        return self._cached("list", super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached("retrieve", super().retrieve, request, *args, **kwargs)
+
+    def _cached(self, action, render, request, *args, **kwargs):
+        # Plain generic views have no self.action; name it after the handler.
+        if action not in self.cached_actions:
+            return render(request, *args, **kwargs)
+
+        scope_versions = versions(self.cache_scopes())
+        viewer = request.user.pk if self.cache_varies_on_user() else "*"
+        raw_key = f"{type(self).__name__}:{action}:{viewer}:{scope_versions}:{request.build_absolute_uri()}"
+        key = "response:" + hashlib.md5(raw_key.encode()).hexdigest()
+        etag = f'"{key[len("response:"):]}"'
+        last_modified = max(scope_versions) // 1_000_000_000
+
+        response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is None:
+            data = _cache().get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = render(request, *args, **kwargs)
+                if response.status_code == 200:
+                    _cache().set(key, response.data, getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300))
+        else:
+            response = Response(status=response.status_code)
+
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            response["Cache-Control"] = "private, no-cache"
+        return response
@@ -3,6 +3,7 @@ Django settings for social_media_api project.
 Production-ready configuration for PythonAnywhere.
 """
 
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "social_media_api.middleware.QueryMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -139,7 +141,7 @@ X_FRAME_OPTIONS = "DENY"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "accounts.authentication.CachedTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
@@ -149,6 +151,158 @@ REST_FRAMEWORK = {
 }
 
 
+# ============================
+# HOME FEED
+# ============================
+
+# Posts by authors with more followers than this are not fanned out and
+# are merged into followers' feeds at read time instead.
+FEED_FANOUT_FOLLOWER_LIMIT = 10000
+
+# Run fan-out on a background worker thread after the post is committed.
+FEED_FANOUT_ASYNC = True
+
+# Recent posts copied into a feed when its owner follows someone new.
+FEED_BACKFILL_LIMIT = 500
+
+
+# ============================
+# COMMENT PREVIEWS
+# ============================
+
+# Oldest comments embedded in each post of a list response (0 disables).
+COMMENT_PREVIEW_SIZE = 3
+
+
+# ============================
+# TRENDING
+# ============================
+
+# Posts kept per trending window (hour/day/week). Run
+# "manage.py recompute_trending" every few minutes to trim and refresh.
+TRENDING_SIZE = 100
+
+
+# ============================
+# POST SEARCH
+# ============================
+
+# Dotted path to a search backend class (posts/search.py). None picks SQLite
+# FTS5 on SQLite and the portable PostSearchTerm index elsewhere. Run
+# "manage.py rebuild_post_search" after switching or after bulk imports.
+POST_SEARCH_BACKEND = None
+
+# Only the newest matches are ranked, so a query matching most posts does
+# not score the whole table.
+POST_SEARCH_RANK_WINDOW = 10000
+
+
+# ============================
+# FOLLOW GRAPH
+# ============================
+
+# Cache holding each user's follower/following id sets (accounts/graph.py).
+FOLLOW_GRAPH_CACHE = "default"
+FOLLOW_GRAPH_TIMEOUT = 300  # seconds
+
+
+# ============================
+# TOKEN AUTHENTICATION
+# ============================
+
+# Authenticated tokens are kept in a per-process LRU (accounts/authentication.py).
+# Entries are dropped when the token is deleted or its user is saved; other
+# processes only notice once the TTL expires.
+TOKEN_AUTH_CACHE_SIZE = 10000
+TOKEN_AUTH_CACHE_TTL = 60  # seconds
+
+# Optional second tier shared between processes, e.g. a Redis-backed cache.
+TOKEN_AUTH_SHARED_CACHE = None
+
+
+# ============================
+# CACHE
+# ============================
+
+# The response cache versions, follow graph and shared token tier live here,
+# so every process must see the same cache: set REDIS_URL wherever more than
+# one worker runs. Without it each process gets its own LocMemCache, which
+# is only correct for a single process (and the tests).
+REDIS_URL = os.environ.get("REDIS_URL")
+
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+
+# ============================
+# RESPONSE CACHE
+# ============================
+
+# Post and comment reads are cached per scope version
+# (social_media_api/response_cache.py) in the cache configured above.
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = 300  # seconds
+
+
+# ============================
+# DATA EXPORT
+# ============================
+
+# Rows fetched per round trip by /api/accounts/export/ and export_user.
+EXPORT_CHUNK_SIZE = 2000
+
+
+# ============================
+# NOTIFICATIONS
+# ============================
+
+# Notifications are queued and written in coalesced batches by a worker
+# thread (see notifications/queue.py).
+NOTIFICATION_QUEUE_ASYNC = True
+NOTIFICATION_BATCH_SIZE = 500
+NOTIFICATION_FLUSH_INTERVAL = 1.0  # seconds
+
+# Delivers new notifications to open /api/notifications/stream/ clients.
+# The in-memory broker only reaches clients connected to the same process.
+NOTIFICATION_BROKER = "notifications.broker.InMemoryBroker"
+NOTIFICATION_STREAM_HEARTBEAT = 15  # seconds between keep-alive comments
+
+
+# ============================
+# LOGGING
+# ============================
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        # One JSON line per request: query count, DB time, slowest SQL.
+        # The test runner below mutes it.
+        "social_media_api.queries": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+    },
+}
+
+TEST_RUNNER = "social_media_api.testing.TestRunner"
+
+
 # ============================
 # CUSTOM USER MODEL
 # ============================
@@ -0,0 +1,105 @@
+"""
+Test helpers shared by the app test suites.
+"""
+
+import logging
+import os
+import sqlite3
+import tempfile
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.test import TransactionTestCase
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+
+class QueryBudgetMixin:
+    """Fail a test when an endpoint issues more SQL queries than allowed.
+
+    Subclasses declare ``query_budgets``, a mapping of URL name to the
+    maximum number of queries one GET of that endpoint may run.
+    """
+
+    query_budgets = {}
+
+    def assertQueryBudget(self, url_name, *args, data=None):
+        budget = self.query_budgets[url_name]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse(url_name, args=args), data)
+
+        if len(context) > budget:
+            statements = "\n".join(
+                f"{i}. {query['sql']}" for i, query in enumerate(context.captured_queries, 1)
+            )
+            self.fail(
+                f"{url_name} ran {len(context)} queries, over its budget of {budget}:\n{statements}"
+            )
+        return response
+
+
+class ConcurrentWritesTestCase(TransactionTestCase):
+    """TransactionTestCase whose threads write to one SQLite file concurrently.
+
+    The in-memory test database uses shared-cache table locks, which fail at
+    once instead of waiting, so it cannot host concurrent writers. On SQLite
+    this class copies the test database to a temporary file for its own
+    duration, opened with ``sqlite_options``. Other backends run unchanged.
+    """
+
+    # Take the write lock at BEGIN and wait for it, so writers queue up
+    # instead of failing with "database is locked".
+    sqlite_options = {"transaction_mode": "IMMEDIATE", "timeout": 20}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        if connection.vendor != "sqlite":
+            return
+        cls._tempdir = tempfile.TemporaryDirectory()
+        path = os.path.join(cls._tempdir.name, "concurrent.sqlite3")
+        connection.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+
+        # New threads build their connection from these settings.
+        cls._saved = connections.settings[DEFAULT_DB_ALIAS], connections[DEFAULT_DB_ALIAS]
+        settings_dict = cls._saved[0]
+        connections.settings[DEFAULT_DB_ALIAS] = {
+            **settings_dict,
+            "NAME": path,
+            "OPTIONS": {**settings_dict["OPTIONS"], **cls.sqlite_options},
+        }
+        connections[DEFAULT_DB_ALIAS] = connections.create_connection(DEFAULT_DB_ALIAS)
+
+    @classmethod
+    def tearDownClass(cls):
+        if hasattr(cls, "_saved"):
+            connections[DEFAULT_DB_ALIAS].close()
+            connections.settings[DEFAULT_DB_ALIAS], connections[DEFAULT_DB_ALIAS] = cls._saved
+            cls._tempdir.cleanup()
+        super().tearDownClass()
+
+
+class TestRunner(DiscoverRunner):
+    """Mutes the per-request query log and swaps in a cheap password hasher.
+
+    The query log writes one line per test request; tests that check it use
+    ``assertLogs``, which re-enables it for their duration. PBKDF2 would
+    make every ``create_user`` in a setUp cost tens of milliseconds.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        logging.getLogger("social_media_api.queries").setLevel(logging.WARNING)
+        self._fast_hashers = override_settings(
+            PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]
+        )
+        self._fast_hashers.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._fast_hashers.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,85 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from notifications.models import Notification
+from notifications.views import NotificationListView
+from posts.models import Comment, Like, Post
+from posts.serializers import comment_previews
+from posts.views import CommentViewSet, PostViewSet
+
+User = get_user_model()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class QueryMetricsMiddlewareTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="testpass123")
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_and_log_line(self):
+        with self.assertLogs("social_media_api.queries", level="INFO") as logs:
+            response = self.client.get(reverse("post-list"))
+
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record["path"], reverse("post-list"))
+        self.assertEqual(record["queries"], 1)
+        self.assertIn("posts_post", record["slowest_sql"])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, FEED_FANOUT_ASYNC=False)
+class FastReadTests(APITestCase):
+    """The .values() list path must render exactly what the serializers do."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="member", password="testpass123")
+        self.actor = User.objects.create_user(username="actor", password="testpass123")
+        self.client.force_authenticate(self.user)
+        for i in range(3):
+            post = Post.objects.create(author=self.actor, title=f"Post {i}", content="é " * 150 * i)
+            Comment.objects.create(post=post, author=self.user, content=f"Comment {i}")
+        Like.objects.create(user=self.user, post=post)
+        Notification.objects.create(recipient=self.user, actor=self.actor, verb="followed you")
+        Notification.objects.create(
+            recipient=self.user, actor=self.actor, verb="liked your post",
+            content_type=ContentType.objects.get_for_model(Post), object_id=post.pk, actor_count=4,
+        )
+
+    def assertMatchesSerializer(self, view_class, params):
+        request = Request(APIRequestFactory().get("/", params))
+        request.user = self.user
+        view = view_class(request=request, format_kwarg=None, action="list")
+        queryset = view.get_queryset().order_by("id")
+
+        fast = view.render_rows(list(view.fast_values(queryset)))
+        instances = list(queryset)
+        if "comments_preview" in view.sparse_fields():
+            previews = comment_previews([post.pk for post in instances])
+            for post in instances:
+                post.comments_preview = previews.get(post.pk, [])
+        slow = view.get_serializer(instances, many=True).data
+        self.assertTrue(fast)
+        self.assertEqual(JSONRenderer().render(fast), JSONRenderer().render(slow), params)
+
+    def test_output_is_byte_identical(self):
+        cases = [
+            (PostViewSet, [{}, {"view": "summary"}, {"fields": "id,excerpt,liked_by_me"}]),
+            (CommentViewSet, [{}, {"omit": "author"}]),
+            (NotificationListView, [{}, {"fields": "summary,object_id,read"}]),
+        ]
+        for view_class, variants in cases:
+            for params in variants:
+                self.assertMatchesSerializer(view_class, params)
+
+    def test_list_endpoints_use_the_fast_path(self):
+        for name in ("post-list", "feed", "post-trending", "comment-list", "notifications"):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, 200, name)